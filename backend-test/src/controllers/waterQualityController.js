@@ -204,6 +204,95 @@ exports.predictWaterQuality = async (req, res) => {
   }
 };
 
+// 多表批量水质预测：一次请求模型服务，按表返回预测结果
+exports.predictWaterQualityBatch = async (req, res) => {
+  try {
+    const { table_names, prediction_hours = 24, model_type = 'R-Informer' } = req.body;
+    
+    // 参数验证
+    if (!Array.isArray(table_names) || table_names.length === 0) {
+      return res.status(400).json({
+        success: false,
+        error: '缺少表名列表参数'
+      });
+    }
+    
+    // 并行获取各表最近1000条数据，单个表读取失败不影响其他表
+    const tableData = await Promise.allSettled(
+      table_names.map(table_name => WaterQuality.getDataByTable(table_name, 1000, 0))
+    );
+    
+    // results与table_names一一对应，读取失败的表直接写入错误
+    const results = new Array(table_names.length);
+    const series = [];
+    const positions = [];
+    tableData.forEach((result, index) => {
+      if (result.status === 'fulfilled') {
+        positions.push(index);
+        series.push({
+          id: table_names[index],
+          input_data: result.value.rows.map(row => [
+            parseFloat(row.temperature),
+            parseFloat(row.pH),
+            parseFloat(row.O2),
+            parseFloat(row.NTU),
+            parseFloat(row.uS)
+          ]),
+          prediction_hours: parseInt(prediction_hours)
+        });
+      } else {
+        results[index] = { id: table_names[index], success: false, error: result.reason.message };
+      }
+    });
+    
+    if (series.length > 0) {
+      const modelServiceUrl = process.env.MODEL_SERVICE_URL || 'http://localhost:5001';
+      
+      const response = await axios.post(`${modelServiceUrl}/api/water-quality/predict/batch`, {
+        series,
+        prediction_hours: parseInt(prediction_hours),
+        model_type: model_type
+      }, {
+        timeout: 60000 // 60秒超时
+      });
+      
+      // 模型服务按series的顺序返回结果
+      response.data.results.forEach((item, i) => {
+        results[positions[i]] = item.success ? {
+          ...item,
+          predictions: item.predictions.map(pred => ({
+            ...pred,
+            quality: determineWaterQuality(pred)
+          }))
+        } : item;
+      });
+    }
+    
+    res.json({
+      success: results.some(item => item.success),
+      results: results,
+      model_type: model_type,
+      prediction_hours: parseInt(prediction_hours)
+    });
+  } catch (error) {
+    console.error('批量预测失败:', error);
+    
+    if (error.code === 'ECONNREFUSED') {
+      res.status(503).json({
+        success: false,
+        error: '模型服务不可用',
+        message: '预测模型服务当前不可用，请稍后重试'
+      });
+    } else {
+      res.status(500).json({
+        success: false,
+        error: '批量预测失败',
+        message: process.env.NODE_ENV === 'development' ? error.message : '服务器内部错误'
+      });
+    }
+  }
+};
+
 // 获取模型列表
 exports.getModelList = async (req, res) => {
   try {
@@ -5,6 +5,7 @@ const {
   getDatasets, 
   getDataByTable, 
   predictWaterQuality,
+  predictWaterQualityBatch,
   getModelList
 } = require('../controllers/waterQualityController');
 
@@ -20,6 +21,9 @@ router.get('/datasets/:table_name/preview', getDataByTable);
 // 水质预测路由
 router.post('/predict', predictWaterQuality);
 
+// 多表批量预测路由
+router.post('/predict/batch', predictWaterQualityBatch);
+
 // 获取模型列表
 router.get('/models', getModelList);
 
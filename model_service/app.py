@@ -1,11 +1,13 @@
 ﻿# model_service/app.py
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import json
 import os
 import sys
+import threading
+import time
 import torch
 from pathlib import Path
 
@@ -15,20 +17,144 @@ sys.path.append(r_informer_path)
 
 # 导入必要的模块
 from exp.exp_informer import Exp_Informer
+from models.attn import use_fused_attention
+from serving.model_cache import ModelCache, LoadedModel
+from serving.batching import BatchScheduler
+from serving.executor import InferenceExecutor, InferenceQueueFull
+from serving.registry import CheckpointRegistry
+from serving.result_cache import ResultCache
+from serving.payload import (PayloadError, is_binary, decode_binary, binary_params, parse_json, parse_pred_len,
+                             parse_timestamp)
+from serving.window_store import StationWindowStore
+from serving.response import LAYOUTS, format_predictions, json_response
+from serving.request_log import logger, configure_logging, start_request, current_timer, finish_request
+from serving.metrics import MetricsRegistry, CONTENT_TYPE as METRICS_CONTENT_TYPE, process_rss_bytes
+from serving.warmup import WarmupState, parse_warmup_models, parse_batch_sizes
+from serving.horizon import HorizonRouter
+from serving.calendar import CalendarEncoder
+from serving.backends import BACKENDS, EXPORT_BACKENDS, artifact_path, artifact_is_current, load_artifact
+from serving.quantization import check_report, quantize_model
 import argparse
 
+# 日志级别及成功请求汇总记录的采样率
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '1.0'))
+configure_logging(LOG_LEVEL, LOG_SAMPLE_RATE)
+# 权重目录及索引刷新间隔(秒)，为0时只在启动时扫描
+CHECKPOINTS_ROOT = os.environ.get('CHECKPOINTS_ROOT', './r-informer/checkpoints/')
+CHECKPOINT_REFRESH_SECONDS = float(os.environ.get('CHECKPOINT_REFRESH_SECONDS', '30'))
+# 模型缓存配置
+MODEL_CACHE_MAX_MB = float(os.environ.get('MODEL_CACHE_MAX_MB', '1024'))
+MODEL_CACHE_MAX_ENTRIES = int(os.environ['MODEL_CACHE_MAX_ENTRIES']) if os.environ.get('MODEL_CACHE_MAX_ENTRIES') else None
+# 预测结果缓存配置，RESULT_CACHE_MAX_ENTRIES为0时关闭
+RESULT_CACHE_TTL = float(os.environ.get('RESULT_CACHE_TTL', '3600'))
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', '1024'))
+# 监测站滑动窗口配置：每个站保留的最近观测行数及最大站点数
+STATION_WINDOW_CAPACITY = int(os.environ.get('STATION_WINDOW_CAPACITY', '1024'))
+STATION_MAX = int(os.environ.get('STATION_MAX', '1024'))
+# 动态微批配置（默认关闭）
+BATCHING_ENABLED = os.environ.get('BATCHING_ENABLED', '0') == '1'
+BATCH_WINDOW_MS = float(os.environ.get('BATCH_WINDOW_MS', '5'))
+BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', '16'))
+# 多序列批量预测接口单次请求的最大序列数
+MAX_BATCH_SERIES = int(os.environ.get('MAX_BATCH_SERIES', '256'))
+# 推理执行器配置：INFERENCE_THREADS为0时在请求线程中直接推理
+INFERENCE_THREADS = int(os.environ.get('INFERENCE_THREADS', '0'))
+INFERENCE_QUEUE_SIZE = int(os.environ.get('INFERENCE_QUEUE_SIZE', '64'))
+if os.environ.get('TORCH_NUM_THREADS'):
+    torch.set_num_threads(int(os.environ['TORCH_NUM_THREADS']))
+# 推理子进程数，为0时在本进程内推理；每个子进程的intra-op线程数默认平分CPU核数
+INFERENCE_PROCESSES = int(os.environ.get('INFERENCE_PROCESSES', '0'))
+INFERENCE_PROCESS_THREADS = int(os.environ['INFERENCE_PROCESS_THREADS']) if os.environ.get('INFERENCE_PROCESS_THREADS') else None
+# 等待推理子进程返回一次前向结果的最长时间(秒)
+INFERENCE_PROCESS_TIMEOUT = float(os.environ.get('INFERENCE_PROCESS_TIMEOUT', '120'))
+if INFERENCE_PROCESSES > 0 and __name__ in ('__main__', '__mp_main__'):
+    # 子进程以spawn方式启动时会重新执行主模块，直接运行app.py时不启用，请使用serve.py
+    INFERENCE_PROCESSES = 0
+# 预测长度路由表(JSON字符串或文件路径)，为空时每个预测长度加载各自的模型
+HORIZON_ROUTES = os.environ.get('HORIZON_ROUTES', '')
+# 时间标记：calendar为按输入窗口时间戳生成的日历标记，zeros为全零标记，
+# auto(默认)只对训练时embed不是timeF的模型使用日历标记
+TIME_MARKS = os.environ.get('TIME_MARKS', 'auto')
+# 推理后端：eager直接调用PyTorch模型，torchscript、onnx加载export_model.py导出的模型，
+# int8在加载时做动态量化；导出文件(int8为验证报告)不存在或早于权重文件时退回eager
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'eager')
+# int8量化允许的MAE、RMSE最大相对变化，验证报告超出时退回eager
+QUANTIZE_TOLERANCE = float(os.environ.get('QUANTIZE_TOLERANCE', '0.02'))
+# FullAttention(解码器交叉注意力及attn为full的自注意力)使用融合的scaled_dot_product_attention，
+# PyTorch低于2.0或模型需要返回注意力矩阵时自动使用原实现；默认关闭，
+# 启用前先用r-informer/benchmark_full_attention.py确认两种实现的输出误差
+FUSED_ATTENTION = os.environ.get('FUSED_ATTENTION', '0') == '1'
+# 启动预热：以分号分隔的data_name:pred_len:weights_name，为空时不预热；
+# 每个模型按WARMUP_BATCH_SIZES中的各个批大小执行一次空输入前向
+WARMUP_MODELS = os.environ.get('WARMUP_MODELS', 'QianTangRiver2020-2024WorkedFull:24:informer_mtest_0')
+WARMUP_BATCH_SIZES = os.environ.get('WARMUP_BATCH_SIZES', f'1,{BATCH_MAX_SIZE}' if BATCHING_ENABLED else '1')
+# 为1(默认)时任一模型预热失败/ready都返回503；为0时预热结束即就绪
+WARMUP_REQUIRED = os.environ.get('WARMUP_REQUIRED', '1') == '1'
+
+# 运行指标，由/metrics以Prometheus文本格式输出
+metrics = MetricsRegistry()
+REQUEST_SECONDS = metrics.histogram('model_service_request_duration_seconds', '请求总耗时', ('endpoint', 'method', 'status'))
+STAGE_SECONDS = metrics.histogram('model_service_stage_duration_seconds', '请求各阶段耗时', ('stage',))
+REQUESTS_IN_FLIGHT = metrics.gauge('model_service_requests_in_flight', '正在处理的请求数', ('endpoint',))
+# 动态合批实际执行的批大小分布
+BATCH_SIZE = metrics.histogram('model_service_batch_size', '动态合批每次前向的请求数', (),
+                               buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+PREDICTIONS = metrics.counter('model_service_predictions_total', '按模型键统计的预测序列数，source为model或result_cache',
+                              ('data_name', 'weights', 'pred_len', 'source'))
+
 class RInformerModel:
-    def __init__(self):
+    def __init__(self, cache_max_mb=MODEL_CACHE_MAX_MB, cache_max_entries=MODEL_CACHE_MAX_ENTRIES,
+                 result_cache_ttl=RESULT_CACHE_TTL, result_cache_max_entries=RESULT_CACHE_MAX_ENTRIES,
+                 batching=BATCHING_ENABLED, batch_window_ms=BATCH_WINDOW_MS, batch_max_size=BATCH_MAX_SIZE,
+                 inference_threads=INFERENCE_THREADS, inference_queue_size=INFERENCE_QUEUE_SIZE,
+                 horizon_routes=HORIZON_ROUTES, time_marks=TIME_MARKS,
+                 inference_processes=INFERENCE_PROCESSES, inference_process_threads=INFERENCE_PROCESS_THREADS,
+                 backend=INFERENCE_BACKEND, quantize_tolerance=QUANTIZE_TOLERANCE, fused_attention=FUSED_ATTENTION):
         self.model_loaded = False
-        self.exp = None
-        self.args = None
-        self.setting = None
+        if backend not in BACKENDS:
+            raise ValueError(f'INFERENCE_BACKEND只能为{", ".join(BACKENDS)}，实际为{backend}')
+        self.backend = backend
+        self.quantize_tolerance = quantize_tolerance
+        self.fused_attention = fused_attention
+        # 时间标记模式及按频率缓存的日历编码器
+        if time_marks not in ('auto', 'calendar', 'zeros'):
+            raise ValueError(f'TIME_MARKS只能为auto、calendar或zeros，实际为{time_marks}')
+        self.time_marks = time_marks
+        self._calendars = {}
+        # 较短的预测长度路由到覆盖它的长预测模型，截取输出的前pred_len步
+        self.router = HorizonRouter.from_spec(horizon_routes)
+        # 已加载权重的模型缓存，键为(data_name, pred_len, weights_name)
+        self.cache = ModelCache(int(cache_max_mb * 1024 * 1024), cache_max_entries)
+        # 相同模型和相同输入窗口的预测结果直接复用
+        self.result_cache = ResultCache(result_cache_ttl, result_cache_max_entries) if result_cache_max_entries > 0 else None
+        # 启动时建立权重索引，权重文件变化时让对应的缓存模型和预测结果失效
+        self.registry = CheckpointRegistry(CHECKPOINTS_ROOT, CHECKPOINT_REFRESH_SECONDS)
+        # 按模型键缓存解析得到的模型参数，结果缓存查找不需要先加载模型
+        self._model_args = {}
+        self.registry.add_listener(self._on_weights_changed)
+        # 相同模型键的并发请求合并为一次批量前向
+        self.batcher = BatchScheduler(self._run_batch, batch_window_ms, batch_max_size) if batching else None
+        # 前向计算交给有界推理线程池，排队过多时快速拒绝
+        self.executor = InferenceExecutor(inference_threads, inference_queue_size) if inference_threads > 0 else None
+        # 前向计算在推理子进程中执行，模型权重通过共享内存只保留一份
+        self.process_pool = None
+        if inference_processes > 0:
+            from serving.process_pool import ProcessInferencePool
+            self.process_pool = ProcessInferencePool(inference_processes, inference_process_threads,
+                                                     max_models=cache_max_entries or 8,
+                                                     timeout=INFERENCE_PROCESS_TIMEOUT)
+            # 主进程缓存淘汰或失效的模型，子进程同时释放，进程池内存不超过缓存预算
+            self.cache.add_listener(self._on_models_removed)
         
-    def initialize_model(self, data_name='QianTangRiver2020-2024WorkedFull', pred_len=24):
+    def initialize_model(self, data_name='QianTangRiver2020-2024WorkedFull', pred_len=24, build=True, **overrides):
         """
         初始化模型
         :param data_name: 数据集名称
         :param pred_len: 预测长度
+        :param build: 为False时只解析模型参数，不创建实验对象和模型，返回的exp为None
+        :param overrides: 覆盖默认值的模型参数，如权重setting中的d_model、d_ff
+        :return: (args, exp, setting)
         """
         try:
             # 设置模型参数（与main_informer.py保持一致）
@@ -44,7 +170,7 @@ class RInformerModel:
             parser.add_argument('--target', type=str, default='O2', help='target feature in S or MS task')
             parser.add_argument('--freq', type=str, default='h',
                                 help='freq for time features encoding, options:[s:secondly, t:minutely, h:hourly, d:daily, b:business days, w:weekly, m:monthly], you can also use more detailed freq like 15min or 3h')
-            parser.add_argument('--checkpoints', type=str, default='./r-informer/checkpoints/', help='location of model checkpoints')
+            parser.add_argument('--checkpoints', type=str, default=CHECKPOINTS_ROOT, help='location of model checkpoints')
 
             parser.add_argument('--seq_len', type=int, default=96, help='input sequence length of Informer encoder')
             parser.add_argument('--label_len', type=int, default=48, help='start token length of Informer decoder')
@@ -63,7 +189,7 @@ class RInformerModel:
             parser.add_argument('--padding', type=int, default=0, help='padding type')
             parser.add_argument('--distil', action='store_false', help='whether to use distilling in encoder, using this argument means not using distilling', default=True)
             parser.add_argument('--dropout', type=float, default=0.05, help='dropout')
-            parser.add_argument('--attn', type=str, default='prob', help='attention used in encoder, options:[prob, full]')
+            parser.add_argument('--attn', type=str, default='prob', help='attention used in encoder, options:[prob, full, full_fused]')
             parser.add_argument('--embed', type=str, default='timeF', help='time features encoding, options:[timeF, fixed, learned]')
             parser.add_argument('--activation', type=str, default='gelu', help='activation')
             parser.add_argument('--output_attention', action='store_true', help='whether to output attention in encoder')
@@ -87,7 +213,9 @@ class RInformerModel:
             parser.add_argument('--use_multi_gpu', action='store_true', help='use multiple gpus', default=False)
             parser.add_argument('--devices', type=str, default='0,1,2,3', help='device ids of multile gpus')
             
-            self.args = parser.parse_args([])
+            args = parser.parse_args([])
+            for name, value in overrides.items():
+                setattr(args, name, value)
             
             # 设置数据相关参数
             data_parser = {
@@ -104,79 +232,140 @@ class RInformerModel:
                 'new_data': {'data': 'new_data.csv', 'T': 'O2', 'M': [5, 5, 5], 'S': [1, 1, 1], 'MS': [5, 5, 1]},
             }
             
-            if self.args.data in data_parser.keys():
-                data_info = data_parser[self.args.data]
-                self.args.data_path = data_info['data']
-                self.args.target = data_info['T']
-                self.args.enc_in, self.args.dec_in, self.args.c_out = data_info[self.args.features]
-
-            self.args.s_layers = [int(s_l) for s_l in self.args.s_layers.replace(' ', '').split(',')]
-            self.args.detail_freq = self.args.freq
-            self.args.freq = self.args.freq[-1:]
+            if args.data in data_parser.keys():
+                data_info = data_parser[args.data]
+                args.data_path = data_info['data']
+                args.target = data_info['T']
+                args.enc_in, args.dec_in, args.c_out = data_info[args.features]
+
+            args.s_layers = [int(s_l) for s_l in args.s_layers.replace(' ', '').split(',')]
+            args.detail_freq = args.freq
+            args.freq = args.freq[-1:]
             
             # 创建实验对象
-            self.exp = Exp_Informer(self.args)
+            exp = Exp_Informer(args) if build else None
             
             # 构建setting字符串（与main_informer.py中保持一致）
-            self.setting = '{}_{}_ft{}_sl{}_ll{}_pl{}_dm{}_nh{}_el{}_dl{}_df{}_at{}_fc{}_eb{}_dt{}_mx{}_{}_{}'.format(
-                self.args.model, self.args.data, self.args.features, self.args.seq_len, self.args.label_len,
-                self.args.pred_len, self.args.d_model, self.args.n_heads, self.args.e_layers, self.args.d_layers,
-                self.args.d_ff, self.args.attn, self.args.factor, self.args.embed, self.args.distil, self.args.mix,
-                self.args.des, 0)
+            setting = '{}_{}_ft{}_sl{}_ll{}_pl{}_dm{}_nh{}_el{}_dl{}_df{}_at{}_fc{}_eb{}_dt{}_mx{}_{}_{}'.format(
+                args.model, args.data, args.features, args.seq_len, args.label_len,
+                args.pred_len, args.d_model, args.n_heads, args.e_layers, args.d_layers,
+                args.d_ff, args.attn, args.factor, args.embed, args.distil, args.mix,
+                args.des, 0)
             
-            self.model_loaded = True
+            return args, exp, setting
             
         except Exception as e:
-            print(f"模型初始化失败: {e}")
-            self.model_loaded = False
-            
-    def predict_from_array(self, input_data, pred_len=24, data_name='QianTangRiver2020-2024WorkedFull', weights_name='informer_mtest_0'):
+            logger.error(f"模型初始化失败: {e}")
+            raise
+
+    def model_key(self, data_name, pred_len, weights_name):
+        """请求对应的实际模型键，启用预测长度路由时pred_len可能大于请求的预测长度"""
+        return self.router.route(data_name, pred_len, weights_name)
+
+    def model_args(self, data_name, pred_len, weights_name):
         """
-        直接从数组数据进行预测
-        :param input_data: 输入数据 (numpy array)
-        :param pred_len: 预测长度
-        :param data_name: 数据集名称
-        :param weights_name: 权重文件名称
-        :return: 预测结果
+        不构建模型，得到模型键对应的模型参数，权重setting中的结构参数覆盖默认值
+        结果按模型键缓存，权重文件变化时清空
+        :return: (args, setting, CheckpointEntry)
         """
-        try:
-            print(f"开始预测，数据名称: {data_name}, 预测长度: {pred_len}, 权重名称: {weights_name}")
+        key = (data_name, pred_len, weights_name)
+        resolved = self._model_args.get(key)
+        if resolved is None:
+            args, _, setting = self.initialize_model(data_name, pred_len, build=False)
+            checkpoint_entry = self.registry.resolve(weights_name, setting)
+            architecture = {name: value for name, value in checkpoint_entry.architecture.items()
+                            if getattr(args, name) != value}
+            if architecture:
+                # 权重的模型结构与默认参数不同(如蒸馏得到的学生模型)，按权重的setting重新构建
+                logger.info(f"按权重setting构建模型: {checkpoint_entry.setting}, 结构参数: {architecture}")
+                args, _, setting = self.initialize_model(data_name, pred_len, build=False, **architecture)
+            resolved = self._model_args[key] = (args, setting, checkpoint_entry)
+        return resolved
+
+    def get_model(self, data_name='QianTangRiver2020-2024WorkedFull', pred_len=24, weights_name='informer_mtest_0'):
+        """
+        从缓存获取可直接推理的模型，未命中时构建模型并加载权重
+        :param pred_len: 模型的预测长度，请求的预测长度应先经model_key路由
+        :return: LoadedModel
+        """
+        key = (data_name, pred_len, weights_name)
+        with current_timer().stage('model_lookup'):
+            entry = self.cache.get(key, lambda: self._load_model(data_name, pred_len, weights_name))
+        self.model_loaded = True
+        return entry
+
+    def warm_up(self, state):
+        """
+        预加载模型并在各批大小下执行一次前向，让首个真实请求不再承担模型构建、权重加载和首次调用的开销
+        :param state: WarmupState
+        """
+        state.start()
+        for key in state.keys:
+            try:
+                entry = self.get_model(*self.model_key(*key))
+                for batch_size in state.batch_sizes:
+                    windows = np.zeros((batch_size, entry.args.seq_len, entry.args.enc_in), dtype=np.float32)
+                    self.predict_batch(entry, windows)
+                state.record(key)
+            except Exception as e:
+                logger.warning(f"模型预热失败: {key}: {e}")
+                state.record(key, e)
+        state.finish()
+        logger.info(f"模型预热完成: {state.to_dict()}")
+
+    def uses_calendar(self, args):
+        """
+        是否为该模型生成日历时间标记
+        embed为timeF时训练数据的时间特征是[-0.5, 0.5]内的小数，TemporalEmbedding取整后全为0，
+        与全零标记等价，因此auto模式下这类模型继续使用全零标记
+        """
+        if self.time_marks == 'auto':
+            return args.embed != 'timeF'
+        return self.time_marks == 'calendar'
+
+    def calendar(self, freq):
+        encoder = self._calendars.get(freq)
+        if encoder is None:
+            encoder = self._calendars[freq] = CalendarEncoder(freq)
+        return encoder
+
+    def _end_time(self, args, end_time):
+        """模型需要日历标记时返回输入窗口最后一个时间步的时刻，未提供时使用当前时间"""
+        if not self.uses_calendar(args):
+            return None
+        return np.datetime64(end_time if end_time is not None else datetime.now()).astype('datetime64[m]')
+
+    def _on_models_removed(self, removed):
+        for entry in removed:
+            self.process_pool.release(entry)
+
+    def _on_weights_changed(self, changed):
+        self._model_args.clear()
+        self.cache.invalidate(lambda key, entry: entry.weights_path in changed)
+        if self.result_cache is not None:
+            self.result_cache.clear()
+
+    def _load_model(self, data_name, pred_len, weights_name):
+        with current_timer().stage('weight_load'):
+            logger.info(f"初始化模型: {data_name}, 预测长度: {pred_len}, 权重名称: {weights_name}")
+            args, setting, checkpoint_entry = self.model_args(data_name, pred_len, weights_name)
+            exp = Exp_Informer(args)
+            best_model_path = checkpoint_entry.path
             
-            if not self.model_loaded or self.exp is None or self.args.pred_len != pred_len:
-                print("初始化模型...")
-                self.initialize_model(data_name, pred_len)
-                
-            if not self.model_loaded:
-                raise Exception("模型未加载")
+            if self.backend in EXPORT_BACKENDS:
+                if artifact_is_current(best_model_path, self.backend):
+                    path = artifact_path(best_model_path, self.backend)
+                    logger.info(f"加载{self.backend}模型: {path}")
+                    return LoadedModel(load_artifact(self.backend, path), args, setting, best_model_path, self.backend, path)
+                logger.warning(f"{best_model_path}没有最新的{self.backend}导出文件，使用eager模式，"
+                               f"可运行export_model.py导出")
+            quantize = False
+            if self.backend == 'int8':
+                quantize, reason = check_report(best_model_path, self.quantize_tolerance)
+                if not quantize:
+                    logger.warning(f"{best_model_path}未启用int8量化，使用eager模式: {reason}")
                 
-            # 加载模型权重，使用传入的权重文件名
-            # 修改路径查找逻辑，先尝试简单路径，再尝试完整路径
-            simple_path = os.path.join(self.args.checkpoints, weights_name)
-            full_path = os.path.join(self.args.checkpoints, self.setting)
-            
-            # 首先检查简单路径（实际文件所在位置）
-            if os.path.exists(simple_path):
-                # 检查简单路径下是否有.pth文件
-                pth_files = [f for f in os.listdir(simple_path) if f.endswith('.pth')]
-                if pth_files:
-                    best_model_path = os.path.join(simple_path, pth_files[0])  # 使用找到的第一个.pth文件
-                else:
-                    # 如果目录存在但没有.pth文件，尝试直接使用目录名+权重名
-                    best_model_path = os.path.join(self.args.checkpoints, f'{weights_name}.pth')
-                    if not os.path.exists(best_model_path):
-                        raise Exception(f"在简单路径 {simple_path} 中未找到.pth文件")
-            else:
-                # 如果简单路径不存在，使用原来的完整路径查找方式
-                best_model_path = os.path.join(full_path, f'{weights_name}.pth')
-                if not os.path.exists(best_model_path):
-                    # 如果完整路径也不存在，尝试在checkpoints根目录查找
-                    root_model_path = os.path.join(self.args.checkpoints, f'{weights_name}.pth')
-                    if os.path.exists(root_model_path):
-                        best_model_path = root_model_path
-                    else:
-                        raise Exception(f"模型文件不存在。已尝试路径: {best_model_path}, {root_model_path}")
-            
-            print(f"尝试加载模型权重: {best_model_path}")
+            logger.info(f"加载模型权重: {best_model_path}")
             
             # 加载模型权重并处理多GPU训练的情况
             checkpoint = torch.load(best_model_path, map_location='cpu')
@@ -189,109 +378,347 @@ class RInformerModel:
                 for k, v in checkpoint.items():
                     name = k[7:]  # 移除'module.'前缀
                     new_state_dict[name] = v
-                self.exp.model.load_state_dict(new_state_dict)
-                print("加载多GPU训练的模型权重")
+                exp.model.load_state_dict(new_state_dict)
+                logger.debug("加载多GPU训练的模型权重")
             else:
                 # 单GPU训练的模型，直接加载
-                self.exp.model.load_state_dict(checkpoint)
-                print("加载单GPU训练的模型权重")
+                exp.model.load_state_dict(checkpoint)
+                logger.debug("加载单GPU训练的模型权重")
         
             # 设置模型为评估模式
-            self.exp.model.eval()
-            
-            # 处理输入数据
-            # input_data应该是形状为(seq_len, features)的数组
-            if len(input_data.shape) == 1:
-                input_data = input_data.reshape(-1, 1)
-                
-            print(f"输入数据形状: {input_data.shape}")
-                
-            # 确保有足够的数据
-            if input_data.shape[0] < self.args.seq_len:
-                raise Exception(f"输入数据长度不足，需要至少{self.args.seq_len}个时间步，但只提供了{input_data.shape[0]}个")
-                
-            # 取最后seq_len个时间步的数据
-            seq_x = input_data[-self.args.seq_len:]
+            exp.model.eval()
+            if self.fused_attention:
+                use_fused_attention(exp.model)
+            if quantize:
+                logger.info(f"动态int8量化: {best_model_path}")
+                return LoadedModel(quantize_model(exp.model, args), args, setting, best_model_path,
+                                   'int8', artifact_path(best_model_path, 'int8'))
+            return LoadedModel(exp.model, args, setting, best_model_path)
+
+    def predict_from_array(self, input_data, pred_len=24, data_name='QianTangRiver2020-2024WorkedFull', weights_name='informer_mtest_0',
+                           end_time=None):
+        """
+        直接从数组数据进行预测
+        :param input_data: 输入数据 (numpy array)
+        :param pred_len: 预测长度
+        :param data_name: 数据集名称
+        :param weights_name: 权重文件名称
+        :param end_time: 输入数据最后一个时间步的时刻，用于生成日历时间标记
+        :return: 预测结果
+        """
+        timer = current_timer()
+        timer.set(data_name=data_name, pred_len=pred_len, weights=weights_name)
+        try:
+            model_key = self.model_key(data_name, pred_len, weights_name)
+            if model_key[1] != pred_len:
+                timer.set(model_pred_len=model_key[1])
+            args = self.model_args(*model_key)[0]
+            with timer.stage('tensor_prep'):
+                seq_x = self._prepare_window(input_data, args)
+                end_time = self._end_time(args, end_time)
             
-            # 转换为tensor
-            seq_x_tensor = torch.FloatTensor(seq_x).unsqueeze(0)  # 添加batch维度
+            # 输入窗口未变化时直接返回缓存的预测结果，只在未命中时加载模型
+            result_key = None
+            if self.result_cache is not None:
+                result_key = ResultCache.fingerprint(model_key if end_time is None else (model_key, str(end_time)), seq_x)
+                cached = self.result_cache.get(result_key)
+                timer.set(result_cache='hit' if cached is not None else 'miss')
+                if cached is not None:
+                    PREDICTIONS.inc(data_name, weights_name, str(pred_len), 'result_cache')
+                    return cached[:pred_len]
             
-            print(f"处理后的输入张量形状: {seq_x_tensor.shape}")
+            entry = self.get_model(*model_key)
+            # 执行预测
+            if self.batcher is not None:
+                with timer.stage('forward'):
+                    predictions = self.batcher.submit(model_key, entry, (seq_x, end_time)).result()
+            else:
+                predictions = self.predict_batch(entry, seq_x[np.newaxis], None if end_time is None else [end_time])[0]
+            if result_key is not None:
+                self.result_cache.put(result_key, predictions)
+            PREDICTIONS.inc(data_name, weights_name, str(pred_len), 'model')
             
-            # 创建时间标记（简化处理）
-            seq_x_mark = torch.zeros((1, self.args.seq_len, 4))  # 简化的时间标记
+            # 结果缓存保存模型的完整输出，不同预测长度的请求可以共用
+            logger.debug(f"预测完成，结果形状: {predictions.shape}")
+            return predictions[:pred_len]
             
-            # 创建解码器输入
-            dec_inp = torch.zeros([1, self.args.label_len + self.args.pred_len, self.args.dec_in])
+        except InferenceQueueFull:
+            raise
+        except Exception as e:
+            raise Exception(f"预测失败: {e}")
+
+    def predict_many(self, series, data_name='QianTangRiver2020-2024WorkedFull', weights_name='informer_mtest_0'):
+        """
+        多序列批量预测，路由到同一模型的序列合并为一次前向计算
+        :param series: [(input_data, pred_len, end_time), ...]，end_time为输入数据最后一个时间步的时刻，可以为None
+        :param data_name: 数据集名称
+        :param weights_name: 权重文件名称
+        :return: 与series一一对应的列表，元素为预测结果或失败时的异常
+        """
+        results = [None] * len(series)
+        groups = {}
+        for i, (_, pred_len, _) in enumerate(series):
+            groups.setdefault(self.model_key(data_name, pred_len, weights_name), []).append(i)
             
-            # 填充前label_len个时间步的数据（从输入序列的最后label_len个时间步）
-            if seq_x.shape[0] >= self.args.label_len:
-                label_data = seq_x[-self.args.label_len:]
-            else:
-                # 如果输入数据不足label_len长度，则使用所有可用数据并用零填充
-                label_data = seq_x
+        for model_key, indices in groups.items():
+            try:
+                args = self.model_args(*model_key)[0]
+            except Exception as e:
+                for i in indices:
+                    results[i] = e
+                continue
                 
-            dec_inp[:, :label_data.shape[0], :] = torch.FloatTensor(label_data)
-            
-            # 解码器时间标记
-            seq_y_mark = torch.zeros((1, self.args.label_len + self.args.pred_len, 4))
+            valid, windows, end_times, result_keys = [], [], [], []
+            for i in indices:
+                try:
+                    with current_timer().stage('tensor_prep'):
+                        window = self._prepare_window(series[i][0], args)
+                        end_time = self._end_time(args, series[i][2])
+                except Exception as e:
+                    results[i] = e
+                    continue
+                # 命中结果缓存的序列不参与前向计算
+                if self.result_cache is not None:
+                    result_key = ResultCache.fingerprint(model_key if end_time is None else (model_key, str(end_time)), window)
+                    cached = self.result_cache.get(result_key)
+                    if cached is not None:
+                        results[i] = cached[:series[i][1]]
+                        PREDICTIONS.inc(data_name, weights_name, str(series[i][1]), 'result_cache')
+                        continue
+                    result_keys.append(result_key)
+                windows.append(window)
+                end_times.append(end_time)
+                valid.append(i)
+            if not windows:
+                continue
+                
+            # 全部命中结果缓存时不加载模型
+            try:
+                entry = self.get_model(*model_key)
+            except Exception as e:
+                for i in valid:
+                    results[i] = e
+                continue
+            try:
+                predictions = self.predict_batch(entry, np.stack(windows), end_times if self.uses_calendar(entry.args) else None)
+            except Exception as e:
+                logger.warning(f"批量预测失败: {str(e)}")
+                for i in valid:
+                    results[i] = e
+                continue
+            for i, pred in zip(valid, predictions):
+                results[i] = pred[:series[i][1]]
+                PREDICTIONS.inc(data_name, weights_name, str(series[i][1]), 'model')
+            for result_key, pred in zip(result_keys, predictions):
+                self.result_cache.put(result_key, pred)
+        return results
+
+    def _prepare_window(self, input_data, args):
+        """
+        检查输入数据并取出最后seq_len个时间步
+        :param input_data: 形状为(time_steps, features)的数组
+        :return: 形状为(seq_len, features)的float32数组
+        """
+        if len(input_data.shape) == 1:
+            input_data = input_data.reshape(-1, 1)
             
-            # 执行预测
-            print("开始执行预测...")
-            with torch.no_grad():
-                if self.args.output_attention:
-                    outputs = self.exp.model(seq_x_tensor, seq_x_mark, dec_inp, seq_y_mark)[0]
-                else:
-                    outputs = self.exp.model(seq_x_tensor, seq_x_mark, dec_inp, seq_y_mark)
-                    
-            # 转换回numpy
-            predictions = outputs.detach().cpu().numpy()
+        if input_data.shape[1] != args.enc_in:
+            raise Exception(f"输入数据特征数应为{args.enc_in}，但提供了{input_data.shape[1]}个")
             
-            print(f"预测结果形状: {predictions.shape}")
+        # 确保有足够的数据
+        if input_data.shape[0] < args.seq_len:
+            raise Exception(f"输入数据长度不足，需要至少{args.seq_len}个时间步，但只提供了{input_data.shape[0]}个")
             
-            # 重塑预测结果，只返回预测部分（pred_len长度）
-            predictions = predictions.reshape(-1, predictions.shape[-1])
-            # 只返回预测部分，不包括label_len部分
-            predictions = predictions[-self.args.pred_len:]
+        # 取最后seq_len个时间步的数据
+        return np.ascontiguousarray(input_data[-args.seq_len:], dtype=np.float32)
+
+    def _run_batch(self, entry, items):
+        BATCH_SIZE.observe(len(items))
+        windows = np.stack([window for window, _ in items])
+        end_times = [end_time for _, end_time in items]
+        predictions = self.predict_batch(entry, windows, end_times if self.uses_calendar(entry.args) else None)
+        return list(predictions)
+
+    def predict_batch(self, entry, windows, end_times=None):
+        """
+        对一批输入窗口执行一次前向计算
+        :param entry: LoadedModel
+        :param windows: 形状为(B, seq_len, features)的float32数组
+        :param end_times: 各窗口最后一个时间步的时刻，为None时使用全零时间标记
+        :return: 形状为(B, pred_len, c_out)的预测结果
+        """
+        args = entry.args
+        timer = current_timer()
+        timer.set(batch_size=int(windows.shape[0]))
+        with timer.stage('tensor_prep'):
+            batch_size = windows.shape[0]
+            windows = np.ascontiguousarray(windows, dtype=np.float32)
+            if not windows.flags.writeable:
+                # 二进制请求体解码得到的数组只读，torch.from_numpy需要可写内存
+                windows = windows.copy()
+            seq_x_tensor = torch.from_numpy(windows)
             
-            print("预测完成")
-            return predictions
+            # 时间标记：日历标记由查找表按批生成，否则使用全零标记
+            if end_times is not None:
+                enc_marks, dec_marks = self.calendar(args.freq).window_marks(
+                    end_times, args.seq_len, args.label_len, args.pred_len)
+                seq_x_mark, seq_y_mark = torch.from_numpy(enc_marks), torch.from_numpy(dec_marks)
+            else:
+                seq_x_mark = torch.zeros((batch_size, args.seq_len, 4))
+                seq_y_mark = torch.zeros((batch_size, args.label_len + args.pred_len, 4))
             
-        except Exception as e:
-            print(f"预测失败: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            raise Exception(f"预测失败: {e}")
+            # 创建解码器输入，前label_len个时间步使用输入序列的最后label_len个时间步
+            dec_inp = torch.zeros([batch_size, args.label_len + args.pred_len, args.dec_in])
+            label_len = min(args.label_len, seq_x_tensor.shape[1])
+            dec_inp[:, :label_len, :] = seq_x_tensor[:, -label_len:, :]
+        
+        with timer.stage('forward'):
+            if self.executor is not None:
+                outputs = self.executor.run(self._forward, entry, seq_x_tensor, seq_x_mark, dec_inp, seq_y_mark)
+            else:
+                outputs = self._forward(entry, seq_x_tensor, seq_x_mark, dec_inp, seq_y_mark)
+                
+        # 只返回预测部分，不包括label_len部分
+        predictions = outputs.detach().cpu().numpy()
+        return predictions[:, -args.pred_len:, :]
+
+    def _forward(self, entry, seq_x_tensor, seq_x_mark, dec_inp, seq_y_mark):
+        if self.process_pool is not None:
+            return self.process_pool.run(entry, seq_x_tensor, seq_x_mark, dec_inp, seq_y_mark)
+        with torch.no_grad():
+            # 导出和量化的模型只返回预测结果
+            if entry.returns_attention:
+                return entry.model(seq_x_tensor, seq_x_mark, dec_inp, seq_y_mark)[0]
+            return entry.model(seq_x_tensor, seq_x_mark, dec_inp, seq_y_mark)
 # 初始化模型
 model = RInformerModel()
+# 启动预热在后台线程执行，完成前及有模型预热失败时/ready返回503
+warmup_state = WarmupState(parse_warmup_models(WARMUP_MODELS), parse_batch_sizes(WARMUP_BATCH_SIZES), WARMUP_REQUIRED)
+if warmup_state.keys:
+    threading.Thread(target=model.warm_up, args=(warmup_state,), name='warmup', daemon=True).start()
+# 各监测站最近的观测数据
+station_store = StationWindowStore(STATION_WINDOW_CAPACITY, STATION_MAX)
 
 app = Flask(__name__)
 
-@app.route('/health', methods=['GET'])
-def health():
-    return jsonify({
+def endpoint_label():
+    """指标中的接口标签使用路由规则而不是实际路径，避免监测站标识造成标签数量膨胀"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@app.before_request
+def begin_request_log():
+    REQUESTS_IN_FLIGHT.inc(endpoint_label())
+    start_request(request.path)
+
+@app.after_request
+def end_request_log(response):
+    # 每个请求输出一条包含各阶段耗时的汇总记录，同时计入延迟直方图
+    timer = finish_request(response.status_code)
+    if timer is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - timer.start, endpoint_label(), request.method, str(response.status_code))
+        for stage, seconds in timer.stages.items():
+            STAGE_SECONDS.observe(seconds, stage)
+    return response
+
+@app.teardown_request
+def end_in_flight(_):
+    REQUESTS_IN_FLIGHT.dec(endpoint_label())
+
+def collect_metrics():
+    """抓取时读取各组件的统计值"""
+    metrics_gauges['process_rss'].set(process_rss_bytes())
+    cache_stats = model.cache.stats()
+    metrics_gauges['model_cache_bytes'].set(cache_stats['bytes'])
+    metrics_gauges['model_cache_entries'].set(cache_stats['entries'])
+    if model.batcher is not None:
+        metrics_gauges['batch_queue_depth'].set(model.batcher.queue_depth())
+    if model.executor is not None:
+        metrics_gauges['inference_pending'].set(model.executor.stats()['pending'])
+    if model.process_pool is not None:
+        for i, worker in enumerate(model.process_pool.stats()['workers']):
+            metrics_gauges['inference_process_pending'].set(worker['pending'], str(i))
+
+metrics_gauges = {
+    'process_rss': metrics.gauge('process_resident_memory_bytes', '进程常驻内存'),
+    'model_cache_bytes': metrics.gauge('model_service_model_cache_bytes', '模型缓存占用的参数内存'),
+    'model_cache_entries': metrics.gauge('model_service_model_cache_entries', '模型缓存中的模型数'),
+    'batch_queue_depth': metrics.gauge('model_service_batch_queue_depth', '等待合批的请求数'),
+    'inference_pending': metrics.gauge('model_service_inference_pending', '推理执行器中进行中及排队中的任务数'),
+    'inference_process_pending': metrics.gauge('model_service_inference_process_pending', '各推理子进程中进行中及排队中的任务数', ('process',))
+}
+metrics.add_collector(collect_metrics)
+
+def request_layout(data):
+    """结果格式，来自查询字符串或请求体中的layout字段"""
+    layout = request.args.get('layout') or data.get('layout', 'rows')
+    if layout not in LAYOUTS:
+        raise PayloadError(f'不支持的结果格式: {layout}，可选: {", ".join(LAYOUTS)}')
+    return layout
+
+def forecast_start(end_time):
+    """第一个预测时刻为输入数据最后一个时间步的下一个小时，未提供时间戳时为当前时间"""
+    return None if end_time is None else end_time + np.timedelta64(1, 'h')
+
+def health_status():
+    """健康检查结果，生产模式下由ASGI前端直接返回，不经过请求线程池"""
+    return {
         'status': 'OK',
         'model_loaded': model.model_loaded,
         'service': 'R-Informer Water Quality Prediction Service'
+    }
+
+def ready_status():
+    """就绪检查结果及状态码，预热完成前或有模型预热失败时返回503，负载均衡器不会把流量发给冷启动的worker"""
+    return warmup_state.status()
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    payload, status = ready_status()
+    return jsonify(payload), status
+
+@app.route('/health', methods=['GET'])
+def health():
+    return jsonify(health_status())
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """获取模型缓存等运行统计"""
+    return jsonify({
+        'success': True,
+        'model_cache': model.cache.stats(),
+        'stations': station_store.stats(),
+        'result_cache': model.result_cache.stats() if model.result_cache is not None else None,
+        'batching': model.batcher.stats() if model.batcher is not None else None,
+        'inference_executor': model.executor.stats() if model.executor is not None else None,
+        'inference_processes': model.process_pool.stats() if model.process_pool is not None else None
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus文本格式的运行指标"""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/api/water-quality/predict', methods=['POST'])
 def predict():
+    timer = current_timer()
     try:
-        # 获取请求数据
-        data = request.json
-        print("接收到的请求数据:", data)  # 添加日志
-        
-        input_data = np.array(data.get('input_data', []))
-        pred_len = data.get('prediction_hours', 24)
-        model_type = data.get('model_type', 'R-Informer')
-        data_name = data.get('data_name', 'QianTangRiver2020-2024WorkedFull')
-        weights_name = data.get('weights', 'informer_mtest_0')
-        
-        print(f"输入数据形状: {input_data.shape}")  # 添加日志
-        print(f"预测长度: {pred_len}")  # 添加日志
-        print(f"数据名称: {data_name}")  # 添加日志
-        print(f"权重名称: {weights_name}")  # 添加日志
+        # 获取请求数据，二进制请求体直接解码为float32数组
+        with timer.stage('parse'):
+            if is_binary(request):
+                input_data = decode_binary(request)
+                data = binary_params(request)
+                if isinstance(data.get('prediction_hours'), list):
+                    raise PayloadError('单序列预测只支持一个prediction_hours')
+            else:
+                data = parse_json(request)
+                input_data = np.array(data.get('input_data', []), dtype=np.float32)
+            pred_len = parse_pred_len(data.get('prediction_hours', 24))
+            model_type = data.get('model_type', 'R-Informer')
+            data_name = data.get('data_name', 'QianTangRiver2020-2024WorkedFull')
+            weights_name = data.get('weights', 'informer_mtest_0')
+            end_time = parse_timestamp(data.get('timestamp'))
+            layout = request_layout(data)
+        timer.set(input_shape=list(input_data.shape))
         
         if len(input_data) == 0:
             return jsonify({
@@ -299,67 +726,249 @@ def predict():
                 'error': '输入数据为空'
             }), 400
         
-        # 确保输入数据是正确的浮点数类型
-        input_data = input_data.astype(np.float32)
-        
         # 执行预测，传递权重文件名
-        predictions = model.predict_from_array(input_data, pred_len, data_name, weights_name)
-        
-        # 生成时间戳
-        start_time = datetime.now()
-        timestamps = [(start_time + timedelta(hours=i)).isoformat() for i in range(pred_len)]
+        predictions = model.predict_from_array(input_data, pred_len, data_name, weights_name, end_time)
         
-        # 格式化结果 - 生成多个参数的预测值
-        result_data = []
-        for i in range(min(len(predictions), pred_len)):
-            pred = predictions[i]
-            
-            # 基于O2预测值生成其他参数的预测值（使用简化的关系模型）
-            o2_value = float(pred[0]) if hasattr(pred, '__len__') else float(pred)
-            
-            # 基于经验关系生成其他参数的估计值
-            # 这些是示例关系，实际应用中应使用更精确的模型
-            temperature = 20 + (o2_value - 8) * 0.5  # 温度与溶解氧的简单反比关系
-            ph = 7.5 + (o2_value - 8) * 0.1  # pH与溶解氧的简单关系
-            ntu = 10 - (o2_value - 8) * 0.5  # 浊度与溶解氧的简单反比关系
-            us = 500 + (o2_value - 8) * 20  # 电导率与溶解氧的简单正比关系
+        with timer.stage('serialization'):
+            result_data = format_predictions(predictions, pred_len, layout, forecast_start(end_time))
             
-            # 确保数值在合理范围内
-            temperature = max(0, min(35, temperature))
-            ph = max(6, min(9, ph))
-            ntu = max(0, ntu)
-            us = max(50, min(1500, us))
+            return json_response({
+                'success': True,
+                'predictions': result_data,
+                'model_type': model_type,
+                'prediction_hours': pred_len,
+                'data_name': data_name
+            })
+        
+    except PayloadError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except InferenceQueueFull as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+    except Exception as e:
+        timer.set(error=str(e))
+        logger.debug("预测过程中出现错误", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/water-quality/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    多序列批量预测，例如每个监测站一个输入窗口
+    请求体: {"series": [{"id": ..., "input_data": [[...]], "prediction_hours": 24}, ...], "data_name": ..., "weights": ...}
+    也可以发送形状为(N, time_steps, features)的二进制张量，prediction_hours为单个值或逗号分隔的N个值
+    单个序列失败不影响其他序列，失败原因在对应结果中返回
+    """
+    timer = current_timer()
+    try:
+        with timer.stage('parse'):
+            if is_binary(request):
+                stacked = decode_binary(request)
+                if stacked.ndim != 3:
+                    raise PayloadError(f'批量二进制输入应为三维(N, time_steps, features)，实际形状为{stacked.shape}')
+                data = binary_params(request)
+                hours = data.pop('prediction_hours', 24)
+                if isinstance(hours, list) and len(hours) != len(stacked):
+                    raise PayloadError(f'prediction_hours个数({len(hours)})与序列数({len(stacked)})不一致')
+                data['series'] = [
+                    {'id': i, 'input_data': stacked[i], 'prediction_hours': hours[i] if isinstance(hours, list) else hours}
+                    for i in range(len(stacked))
+                ]
+            else:
+                data = parse_json(request)
+            series = data.get('series', [])
+            default_pred_len = data.get('prediction_hours', 24)
+            default_timestamp = data.get('timestamp')
+            model_type = data.get('model_type', 'R-Informer')
+            data_name = data.get('data_name', 'QianTangRiver2020-2024WorkedFull')
+            weights_name = data.get('weights', 'informer_mtest_0')
+            layout = request_layout(data)
+        
+        if not series:
+            return jsonify({
+                'success': False,
+                'error': '序列列表为空'
+            }), 400
+        if len(series) > MAX_BATCH_SERIES:
+            return jsonify({
+                'success': False,
+                'error': f'单次请求最多支持{MAX_BATCH_SERIES}个序列'
+            }), 400
             
-            result_item = {
-                'date': timestamps[i],
-                'temperature': round(temperature, 2),
-                'pH': round(ph, 2),
-                'O2': round(o2_value, 2),
-                'NTU': round(ntu, 2),
-                'uS': round(us, 2)
-            }
+        timer.set(series=len(series), data_name=data_name, weights=weights_name)
+        
+        # 解析每个序列，解析失败的序列直接记录错误
+        results = [None] * len(series)
+        parsed, positions = [], []
+        with timer.stage('parse'):
+            for i, item in enumerate(series):
+                try:
+                    input_data = np.asarray(item.get('input_data', []), dtype=np.float32)
+                    if len(input_data) == 0:
+                        raise Exception('输入数据为空')
+                    parsed.append((input_data, parse_pred_len(item.get('prediction_hours', default_pred_len)),
+                                   parse_timestamp(item.get('timestamp', default_timestamp))))
+                    positions.append(i)
+                except Exception as e:
+                    results[i] = e
+                
+        outcomes = model.predict_many(parsed, data_name, weights_name)
+        for i, (_, pred_len, end_time), outcome in zip(positions, parsed, outcomes):
+            results[i] = outcome if isinstance(outcome, Exception) else (outcome, pred_len, end_time)
             
-            result_data.append(result_item)
+        with timer.stage('serialization'):
+            response_items = []
+            for i, outcome in enumerate(results):
+                item = {'id': series[i].get('id', i) if isinstance(series[i], dict) else i}
+                if isinstance(outcome, Exception):
+                    item.update({'success': False, 'error': str(outcome)})
+                else:
+                    predictions, pred_len, end_time = outcome
+                    item.update({
+                        'success': True,
+                        'predictions': format_predictions(predictions, pred_len, layout, forecast_start(end_time)),
+                        'prediction_hours': pred_len
+                    })
+                response_items.append(item)
+                
+            succeeded = sum(1 for item in response_items if item['success'])
+            timer.set(succeeded=succeeded, failed=len(response_items) - succeeded)
+            return json_response({
+                'success': succeeded > 0,
+                'results': response_items,
+                'succeeded': succeeded,
+                'failed': len(response_items) - succeeded,
+                'model_type': model_type,
+                'data_name': data_name
+            })
         
+    except PayloadError as e:
         return jsonify({
-            'success': True,
-            'predictions': result_data,
-            'model_type': model_type,
-            'prediction_hours': pred_len,
-            'data_name': data_name
-        })
-        
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
-        print(f"预测过程中出现错误: {str(e)}")  # 添加错误日志
-        import traceback
-        traceback.print_exc()  # 打印详细错误堆栈
+        timer.set(error=str(e))
+        logger.debug("批量预测过程中出现错误", exc_info=True)
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
+
+def predict_station(station_id, params):
+    """
+    使用监测站缓冲区中最近seq_len个时间步进行预测
+    :param station_id: 监测站标识
+    :param params: 包含prediction_hours、data_name、weights、model_type的参数字典
+    """
+    pred_len = parse_pred_len(params.get('prediction_hours', 24))
+    model_type = params.get('model_type', 'R-Informer')
+    data_name = params.get('data_name', 'QianTangRiver2020-2024WorkedFull')
+    weights_name = params.get('weights', 'informer_mtest_0')
+    layout = request_layout(params)
+    
+    timer = current_timer()
+    timer.set(station_id=station_id)
+    # 只需要seq_len，模型由predict_from_array在结果缓存未命中时加载
+    args = model.model_args(*model.model_key(data_name, pred_len, weights_name))[0]
+    with timer.stage('tensor_prep'):
+        window = station_store.get(station_id)
+        input_data = window.latest(args.seq_len)
+        end_time = window.last_timestamp
+    predictions = model.predict_from_array(input_data, pred_len, data_name, weights_name, end_time)
+    
+    with timer.stage('serialization'):
+        result_data = format_predictions(predictions, pred_len, layout, forecast_start(end_time))
+    return {
+        'success': True,
+        'station_id': station_id,
+        'predictions': result_data,
+        'model_type': model_type,
+        'prediction_hours': pred_len,
+        'data_name': data_name
+    }
+
+def station_error_response(station_id, e):
+    if isinstance(e, KeyError):
+        return jsonify({
+            'success': False,
+            'error': f'监测站{station_id}没有观测数据'
+        }), 404
+    if isinstance(e, (PayloadError, ValueError)):
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    if isinstance(e, InferenceQueueFull):
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+    current_timer().set(error=str(e))
+    logger.debug(f"监测站{station_id}请求处理失败", exc_info=True)
+    return jsonify({
+        'success': False,
+        'error': str(e)
+    }), 500
+
+@app.route('/api/water-quality/stations/<station_id>/observations', methods=['POST'])
+def append_observations(station_id):
+    """
+    追加监测站的新观测行，只需发送新数据
+    请求体: {"rows": [[...]], "timestamp": 最后一行的观测时间, "predict": 是否立即重新预测, ...预测参数}
+    省略timestamp时最后观测时间按追加的行数逐小时顺延
+    也可以发送二进制张量，此时timestamp、predict及预测参数通过查询字符串传递
+    """
+    try:
+        with current_timer().stage('parse'):
+            if is_binary(request):
+                rows = decode_binary(request)
+                data = binary_params(request)
+                data['predict'] = request.args.get('predict', '').lower() in ('1', 'true')
+            else:
+                data = parse_json(request)
+                rows = data.get('rows', [])
+            
+        window = station_store.append(station_id, rows, parse_timestamp(data.get('timestamp')))
+        result = {
+            'success': True,
+            'station_id': station_id,
+            'appended': int(np.shape(rows)[0]),
+            'available': window.available
+        }
+        # 新数据到达后直接重新计算预测
+        if data.get('predict'):
+            result.update(predict_station(station_id, data))
+        return json_response(result)
+        
+    except Exception as e:
+        return station_error_response(station_id, e)
+
+@app.route('/api/water-quality/stations/<station_id>/predict', methods=['POST'])
+def predict_by_station(station_id):
+    """
+    按监测站预测，输入窗口直接从缓冲区读取
+    请求体: {"prediction_hours": 24, "data_name": ..., "weights": ..., "model_type": ...}
+    """
+    try:
+        return json_response(predict_station(station_id, request.get_json(silent=True) or {}))
+    except Exception as e:
+        return station_error_response(station_id, e)
+
 @app.route('/models', methods=['GET'])
 def get_models():
-    """获取可用模型列表"""
+    """
+    获取可用模型列表
+    models、datasets保持原有内容，前端及backend-test依赖其中的accuracy等字段；
+    checkpoints为启动时建立的权重索引中实际可加载的权重
+    """
     models = [
         {
             'name': 'R-Informer',
@@ -371,7 +980,7 @@ def get_models():
         }
     ]
     
-    # 添加可用数据集列表
+    # 添加可用数据集列表，权重索引中的其他数据集追加在后面
     datasets = [
         'QianTangRiver2020-2024WorkedFull',
         'qiantangjiang',
@@ -383,12 +992,26 @@ def get_models():
         'ECL',
         'Solar'
     ]
+    datasets.extend(name for name in model.registry.datasets() if name not in datasets)
+    
+    checkpoints = []
+    for entry in model.registry.entries():
+        checkpoints.append({
+            'name': entry.name,
+            'trainDate': datetime.fromtimestamp(entry.mtime).strftime('%Y-%m-%d'),
+            'dataset': entry.dataset,
+            'pred_len': entry.pred_len,
+            'setting': entry.setting
+        })
     
     return jsonify({
         'success': True,
         'models': models,
-        'datasets': datasets
+        'datasets': datasets,
+        'checkpoints': checkpoints,
+        'horizon_routes': model.router.table()
     })
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
+    # 开发服务器；生产环境请使用 python serve.py
+    app.run(host='0.0.0.0', port=5001, debug=os.environ.get('FLASK_DEBUG', '1') == '1')
\ No newline at end of file
@@ -0,0 +1,89 @@
+# model_service/benchmark_backends.py
+"""
+比较不同推理后端的延迟和内存
+每个后端在独立的子进程中测量，内存互不影响；需要先用export_model.py导出对应的模型
+
+用法: python benchmark_backends.py --backends eager,torchscript,onnx,int8 --batch-sizes 1,8,32 --iterations 50
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+def run_child(args):
+    """在当前进程中加载指定后端并测量，结果以JSON输出到标准输出"""
+    os.environ['WARMUP_MODELS'] = ''
+    os.environ['CHECKPOINT_REFRESH_SECONDS'] = '0'
+    os.environ['RESULT_CACHE_MAX_ENTRIES'] = '0'
+    os.environ['INFERENCE_BACKEND'] = args.child
+    import numpy as np
+    from app import model
+    from serving.metrics import process_rss_bytes
+
+    rss_before = process_rss_bytes()
+    entry = model.get_model(*model.model_key(args.data_name, args.pred_len, args.weights))
+    rss_loaded = process_rss_bytes()
+    result = {
+        'backend': entry.backend,
+        'requested_backend': args.child,
+        'model_bytes': entry.nbytes,
+        'load_rss_bytes': rss_loaded - rss_before,
+        'latency_ms': {}
+    }
+    rng = np.random.default_rng(0)
+    for batch_size in (int(size) for size in args.batch_sizes.split(',')):
+        windows = rng.standard_normal((batch_size, entry.args.seq_len, entry.args.enc_in)).astype(np.float32)
+        for _ in range(args.warmup):
+            model.predict_batch(entry, windows)
+        timings = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            model.predict_batch(entry, windows)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings = np.array(timings)
+        result['latency_ms'][batch_size] = {
+            'mean': round(float(timings.mean()), 3),
+            'p50': round(float(np.percentile(timings, 50)), 3),
+            'p95': round(float(np.percentile(timings, 95)), 3),
+            'per_window': round(float(timings.mean()) / batch_size, 3)
+        }
+    result['peak_rss_bytes'] = process_rss_bytes()
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare latency and memory of the model service inference backends')
+    parser.add_argument('--backends', type=str, default='eager,torchscript,onnx,int8', help='backends to compare')
+    parser.add_argument('--data-name', type=str, default='QianTangRiver2020-2024WorkedFull', help='dataset name')
+    parser.add_argument('--pred-len', type=int, default=24, help='prediction length')
+    parser.add_argument('--weights', type=str, default='informer_mtest_0', help='weights name')
+    parser.add_argument('--batch-sizes', type=str, default='1,8,32', help='batch sizes to time')
+    parser.add_argument('--iterations', type=int, default=50, help='timed forwards per batch size')
+    parser.add_argument('--warmup', type=int, default=5, help='untimed forwards per batch size')
+    parser.add_argument('--child', type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    results = []
+    for backend in args.backends.split(','):
+        command = [sys.executable, os.path.abspath(__file__), '--child', backend] + [
+            f'--{name}={value}' for name, value in (
+                ('data-name', args.data_name), ('pred-len', args.pred_len), ('weights', args.weights),
+                ('batch-sizes', args.batch_sizes), ('iterations', args.iterations), ('warmup', args.warmup))]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            results.append({'requested_backend': backend, 'error': completed.stderr.strip().splitlines()[-1:]})
+            continue
+        # 子进程的日志也输出到标准输出，结果为最后一行
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# model_service/export_model.py
+"""
+导出推理模型
+加载与服务相同的模型和权重，导出后保存在权重文件旁边，服务设置INFERENCE_BACKEND后自动加载；
+int8不导出模型，而是在测试集上比较浮点模型和量化模型的指标并保存验证报告
+
+用法: python export_model.py --data-name QianTangRiver2020-2024WorkedFull --pred-len 24 --weights informer_mtest_0
+      python export_model.py --backend onnx --parity-windows 256
+      python export_model.py --backend int8 --quantize-tolerance 0.02
+"""
+import argparse
+import json
+import os
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export an R-Informer checkpoint for the model service')
+    parser.add_argument('--data-name', type=str, default='QianTangRiver2020-2024WorkedFull', help='dataset name')
+    parser.add_argument('--pred-len', type=int, default=24, help='prediction length (horizon routes apply)')
+    parser.add_argument('--weights', type=str, default='informer_mtest_0', help='weights name')
+    parser.add_argument('--backend', type=str, default='torchscript', help='export format: torchscript, onnx or int8')
+    parser.add_argument('--batch-sizes', type=str, default='1,4',
+                        help='batch sizes used to check the exported model against the eager model')
+    parser.add_argument('--parity-windows', type=int, default=256,
+                        help='held-out test windows used to check the onnx graph; 0 uses random inputs')
+    parser.add_argument('--opset', type=int, default=13, help='onnx opset version (torch 1.8 supports up to 13)')
+    parser.add_argument('--tolerance', type=float, default=1e-4, help='maximum absolute difference allowed')
+    parser.add_argument('--validation-windows', type=int, default=0,
+                        help='test windows used to validate int8 quantization; 0 uses the whole test split')
+    parser.add_argument('--quantize-tolerance', type=float, default=0.02,
+                        help='maximum relative MAE/RMSE increase reported as acceptable for int8')
+    args = parser.parse_args()
+
+    # 只加载指定模型：不预热、不监视权重目录，并始终从原始权重导出
+    os.environ['WARMUP_MODELS'] = ''
+    os.environ['CHECKPOINT_REFRESH_SECONDS'] = '0'
+    os.environ['INFERENCE_BACKEND'] = 'eager'
+    from app import model
+    from serving.backends import artifact_path, export_torchscript, export_onnx
+    from serving.validation import test_batches
+    from serving.quantization import validate, check_report
+
+    if args.backend not in ('torchscript', 'onnx', 'int8'):
+        raise ValueError(f'不支持的导出格式: {args.backend}')
+    entry = model.get_model(*model.model_key(args.data_name, args.pred_len, args.weights))
+    path = artifact_path(entry.weights_path, args.backend)
+    if args.backend == 'int8':
+        report = validate(entry.model, entry.args, entry.weights_path, args.validation_windows or None)
+        passed, reason = check_report(entry.weights_path, args.quantize_tolerance)
+        print(json.dumps(dict(report, report=path, passed=passed, reason=reason), ensure_ascii=False, indent=2))
+        return
+    if args.backend == 'torchscript':
+        batch_sizes = tuple(int(size) for size in args.batch_sizes.split(','))
+        errors = export_torchscript(entry.model, entry.args, path, batch_sizes, args.tolerance)
+    else:
+        # 使用测试集中的窗口检查一致性
+        check_batches = list(test_batches(entry.args, args.parity_windows)) if args.parity_windows > 0 else None
+        errors = export_onnx(entry.model, entry.args, path, check_batches, args.tolerance, args.opset)
+    print(json.dumps({
+        'backend': args.backend,
+        'weights': entry.weights_path,
+        'artifact': path,
+        'max_abs_error': errors
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
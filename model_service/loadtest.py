@@ -0,0 +1,336 @@
+# model_service/loadtest.py
+"""
+预测服务压测
+从r-informer/data/ETT下的CSV中截取真实的输入窗口作为请求体，按设定的并发数和请求速率调用
+/api/water-quality/predict，按预测长度统计吞吐量和p50/p95/p99延迟，结果保存为JSON便于比较不同版本的服务。
+只依赖标准库。
+
+用法: python app.py  (另一个终端)
+      python loadtest.py --pred-lens 24,48 --concurrency 8 --duration 60
+      python loadtest.py --start-server --rate 20 --concurrency 16 --output loadtest_results/rate20.json
+"""
+import argparse
+import csv
+import http.client
+import itertools
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+DATE_FORMATS = ('%Y-%m-%d %H', '%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S', '%Y/%m/%d %H:%M', '%Y/%m/%d %H:%M:%S')
+
+
+def parse_date(value):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def load_rows(path, target):
+    """
+    读取CSV，列顺序与Dataset_Custom一致：date、其余特征、目标列
+    :return: (列名, [(时刻, 特征值列表)])，含空值的行被跳过
+    """
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        if target not in header:
+            raise ValueError(f'{path}中没有目标列{target}')
+        columns = [name for name in header if name not in ('date', target)] + [target]
+        indices = [header.index(name) for name in columns]
+        date_index = header.index('date') if 'date' in header else None
+        rows = []
+        for record in reader:
+            try:
+                values = [float(record[i]) for i in indices]
+            except (ValueError, IndexError):
+                continue
+            rows.append((parse_date(record[date_index]) if date_index is not None else None, values))
+    return columns, rows
+
+
+def build_payloads(rows, args, pred_lens):
+    """
+    随机截取连续seq_len行作为输入窗口，每个预测长度各生成args.windows个请求体
+    :return: {pred_len: [bytes]}
+    """
+    rng = random.Random(args.seed)
+    payloads = {}
+    for pred_len in pred_lens:
+        bodies = []
+        for _ in range(args.windows):
+            start = rng.randrange(0, len(rows) - args.seq_len + 1)
+            window = rows[start:start + args.seq_len]
+            body = {
+                'input_data': [values for _, values in window],
+                'prediction_hours': pred_len,
+                'data_name': args.data_name,
+                'weights': args.weights
+            }
+            end_time = window[-1][0]
+            if args.timestamps and end_time is not None:
+                body['timestamp'] = end_time.strftime('%Y-%m-%dT%H:%M')
+            bodies.append(json.dumps(body).encode('utf-8'))
+        payloads[pred_len] = bodies
+    return payloads
+
+
+def percentile(sorted_values, q):
+    """最近秩法计算分位数，sorted_values已升序排列"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(results, elapsed):
+    """
+    :param results: [(pred_len, 延迟秒, 状态码或None, 错误信息)]
+    :return: 请求数、成功数、按状态码统计的失败数、吞吐量及成功请求的延迟分布(毫秒)
+    """
+    latencies = sorted(latency * 1000 for _, latency, status, _ in results if status == 200)
+    failures = {}
+    for _, _, status, error in results:
+        if status != 200:
+            key = str(status) if status is not None else (error or 'error')
+            failures[key] = failures.get(key, 0) + 1
+    summary = {
+        'requests': len(results),
+        'succeeded': len(latencies),
+        'failures': failures,
+        'throughput_rps': round(len(latencies) / elapsed, 3) if elapsed > 0 else None,
+        'latency_ms': None
+    }
+    if latencies:
+        summary['latency_ms'] = {
+            'mean': round(sum(latencies) / len(latencies), 3),
+            'p50': round(percentile(latencies, 50), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'max': round(latencies[-1], 3)
+        }
+    return summary
+
+
+class LoadGenerator:
+    """
+    每个并发线程使用一个持久连接顺序发送请求
+    rate为0时线程收到响应后立即发送下一个请求(闭环)；rate大于0时按全局固定间隔安排发送时刻(开环)，
+    发送时刻晚于计划时记录滞后，滞后持续增长说明服务或压测端已跟不上设定速率
+    """
+    def __init__(self, url, payloads, concurrency, rate, duration, max_requests=None, timeout=60.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = '/api/water-quality/predict'
+        self.payloads = payloads
+        self.pred_lens = sorted(payloads)
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.max_requests = max_requests
+        self.timeout = timeout
+        self.results = []
+        self.lags = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def _next(self):
+        """下一个请求的序号，超过时长或请求数时返回None"""
+        index = next(self._counter)
+        if self.max_requests is not None and index >= self.max_requests:
+            return None
+        return index
+
+    def _connect(self):
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _worker(self, start):
+        connection = self._connect()
+        results, lags = [], []
+        deadline = start + self.duration
+        while True:
+            index = self._next()
+            if index is None:
+                break
+            if self.rate > 0:
+                scheduled = start + index / self.rate
+                now = time.perf_counter()
+                if scheduled >= deadline:
+                    break
+                if scheduled > now:
+                    time.sleep(scheduled - now)
+                else:
+                    lags.append(now - scheduled)
+            elif time.perf_counter() >= deadline:
+                break
+            # 各预测长度轮流发送，请求体按序号循环使用
+            pred_len = self.pred_lens[index % len(self.pred_lens)]
+            bodies = self.payloads[pred_len]
+            body = bodies[(index // len(self.pred_lens)) % len(bodies)]
+            sent = time.perf_counter()
+            status, error = None, None
+            try:
+                connection.request('POST', self.path, body, {'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+                if response.will_close:
+                    connection.close()
+                    connection = self._connect()
+            except (OSError, http.client.HTTPException) as e:
+                error = type(e).__name__
+                connection.close()
+                connection = self._connect()
+            results.append((pred_len, time.perf_counter() - sent, status, error))
+        connection.close()
+        with self._lock:
+            self.results.extend(results)
+            self.lags.extend(lags)
+
+    def run(self):
+        start = time.perf_counter()
+        threads = [threading.Thread(target=self._worker, args=(start,), name=f'loadtest-{i}', daemon=True)
+                   for i in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start
+
+    def report(self, elapsed):
+        report = {
+            'elapsed_seconds': round(elapsed, 3),
+            'overall': summarize(self.results, elapsed),
+            'pred_len': {str(pred_len): summarize([r for r in self.results if r[0] == pred_len], elapsed)
+                         for pred_len in self.pred_lens}
+        }
+        if self.rate > 0:
+            lags = sorted(lag * 1000 for lag in self.lags)
+            report['schedule_lag_ms'] = {
+                'late_requests': len(lags),
+                'p95': round(percentile(lags, 95), 3) if lags else 0.0,
+                'max': round(lags[-1], 3) if lags else 0.0
+            }
+        return report
+
+
+def wait_ready(url, timeout):
+    """轮询/ready直到服务完成预热，超时抛出异常"""
+    parts = urlsplit(url)
+    deadline = time.time() + timeout
+    last_error = None
+    while time.time() < deadline:
+        connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=5)
+        try:
+            connection.request('GET', '/ready')
+            response = connection.getresponse()
+            response.read()
+            if response.status == 200:
+                return
+            last_error = f'HTTP {response.status}'
+        except (OSError, http.client.HTTPException) as e:
+            last_error = type(e).__name__
+        finally:
+            connection.close()
+        time.sleep(1)
+    raise TimeoutError(f'服务在{timeout}秒内未就绪: {last_error}')
+
+
+def start_server():
+    """在子进程中启动app.py开发服务器，关闭调试模式以免重载器启动第二个进程"""
+    env = dict(os.environ, FLASK_DEBUG='0')
+    directory = os.path.dirname(os.path.abspath(__file__))
+    return subprocess.Popen([sys.executable, os.path.join(directory, 'app.py')], cwd=directory, env=env)
+
+
+def print_table(report):
+    print(f"{'pred_len':>8} {'requests':>9} {'ok':>7} {'rps':>9} {'p50_ms':>9} {'p95_ms':>9} {'p99_ms':>9}")
+    for name, summary in list(report['pred_len'].items()) + [('all', report['overall'])]:
+        latency = summary['latency_ms'] or {}
+        print(f"{name:>8} {summary['requests']:>9} {summary['succeeded']:>7} {summary['throughput_rps'] or 0:>9} "
+              f"{latency.get('p50', '-'):>9} {latency.get('p95', '-'):>9} {latency.get('p99', '-'):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the water quality prediction service')
+    parser.add_argument('--url', type=str, default='http://127.0.0.1:5001', help='service base url')
+    parser.add_argument('--start-server', action='store_true', help='start app.py in a subprocess for the run')
+    parser.add_argument('--ready-timeout', type=float, default=300, help='seconds to wait for /ready')
+    parser.add_argument('--data-dir', type=str, default='./r-informer/data/ETT/', help='directory of the data files')
+    parser.add_argument('--data-name', type=str, default='QianTangRiver2020-2024WorkedFull',
+                        help='dataset name; <data-name>.csv is read from --data-dir')
+    parser.add_argument('--target', type=str, default='O2', help='target column, moved last as in training')
+    parser.add_argument('--weights', type=str, default='informer_mtest_0', help='weights name')
+    parser.add_argument('--pred-lens', type=str, default='24', help='comma separated prediction lengths, sent in turn')
+    parser.add_argument('--seq-len', type=int, default=96, help='time steps per input window')
+    parser.add_argument('--windows', type=int, default=256, help='distinct input windows per prediction length')
+    parser.add_argument('--timestamps', action='store_true', help='send the window end time as timestamp')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent connections')
+    parser.add_argument('--rate', type=float, default=0, help='total requests per second; 0 sends back to back')
+    parser.add_argument('--duration', type=float, default=30, help='test duration in seconds')
+    parser.add_argument('--requests', type=int, default=None, help='stop after this many requests')
+    parser.add_argument('--warmup', type=float, default=5, help='seconds of untimed requests before the run')
+    parser.add_argument('--timeout', type=float, default=60, help='per request timeout in seconds')
+    parser.add_argument('--seed', type=int, default=0, help='random seed for window selection')
+    parser.add_argument('--output', type=str, default=None,
+                        help='result file (default: loadtest_results/<time>.json)')
+    args = parser.parse_args()
+
+    pred_lens = [int(p) for p in args.pred_lens.split(',')]
+    columns, rows = load_rows(os.path.join(args.data_dir, f'{args.data_name}.csv'), args.target)
+    if len(rows) < args.seq_len:
+        raise ValueError(f'数据只有{len(rows)}行，不足seq_len={args.seq_len}')
+    payloads = build_payloads(rows, args, pred_lens)
+
+    started = datetime.now()
+    server = start_server() if args.start_server else None
+    try:
+        wait_ready(args.url, args.ready_timeout)
+        if args.warmup > 0:
+            LoadGenerator(args.url, payloads, args.concurrency, 0, args.warmup, timeout=args.timeout).run()
+        generator = LoadGenerator(args.url, payloads, args.concurrency, args.rate, args.duration,
+                                  args.requests, args.timeout)
+        elapsed = generator.run()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = generator.report(elapsed)
+    report['config'] = {
+        'url': args.url,
+        'data_name': args.data_name,
+        'weights': args.weights,
+        'columns': columns,
+        'pred_lens': pred_lens,
+        'seq_len': args.seq_len,
+        'windows': args.windows,
+        'timestamps': args.timestamps,
+        'concurrency': args.concurrency,
+        'rate': args.rate,
+        'duration': args.duration,
+        'requests': args.requests,
+        'started': started.isoformat(timespec='seconds')
+    }
+    output = args.output or os.path.join('loadtest_results', started.strftime('%Y%m%d-%H%M%S') + '.json')
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print_table(report)
+    print(f'结果已保存: {output}')
+
+
+if __name__ == '__main__':
+    main()
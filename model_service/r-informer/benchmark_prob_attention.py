@@ -0,0 +1,146 @@
+"""
+ProbAttention._prob_QK的峰值内存和耗时对比
+legacy为原先先expand K再整体索引的实现，chunked为models/attn.py中按query分块采样key的实现；
+两者使用相同的采样位置，同时检查输出是否一致。
+CPU上每个(实现, seq_len)在独立的子进程中运行，峰值内存为ru_maxrss相对输入分配后的增量；CUDA上使用max_memory_allocated
+
+用法: python benchmark_prob_attention.py --seq-lens 96,192,384,768,1536,2048 --batch-size 32
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import torch
+
+from models.attn import ProbAttention
+
+
+def legacy_prob_QK(attention, Q, K, sample_k, n_top):
+    """原先的实现：K展开为[B, H, L_Q, L_K, E]的视图后整体索引出[B, H, L_Q, sample_k, E]的副本"""
+    B, H, L_K, E = K.shape
+    _, _, L_Q, _ = Q.shape
+    K_expand = K.unsqueeze(-3).expand(B, H, L_Q, L_K, E)
+    index_sample = attention._sample_index(L_K, L_Q, sample_k)
+    K_sample = K_expand[:, :, torch.arange(L_Q).unsqueeze(1), index_sample, :]
+    Q_K_sample = torch.matmul(Q.unsqueeze(-2), K_sample.transpose(-2, -1)).squeeze(-2)
+    M = Q_K_sample.max(-1)[0] - torch.div(Q_K_sample.sum(-1), L_K)
+    M_top = M.topk(n_top, sorted=False)[1]
+    Q_reduce = Q[torch.arange(B)[:, None, None], torch.arange(H)[None, :, None], M_top, :]
+    return torch.matmul(Q_reduce, K.transpose(-2, -1)), M_top
+
+
+def sample_sizes(factor, L_Q, L_K):
+    """与ProbAttention.forward相同的sample_k和n_top"""
+    U_part = min(factor * int(np.ceil(np.log(L_K))), L_K)
+    u = min(factor * int(np.ceil(np.log(L_Q))), L_Q)
+    return U_part, u
+
+
+def peak_rss_bytes():
+    import resource
+    # Linux上ru_maxrss的单位为KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_case(args):
+    """在当前进程中测量一种实现，结果以JSON输出到标准输出"""
+    device = torch.device(args.device)
+    torch.set_num_threads(args.threads or torch.get_num_threads())
+    generator = torch.Generator().manual_seed(0)
+    L = args.case_seq_len
+    Q = torch.randn(args.batch_size, args.heads, L, args.head_dim, generator=generator).to(device)
+    K = torch.randn(args.batch_size, args.heads, L, args.head_dim, generator=generator).to(device)
+    attention = ProbAttention(False, args.factor, attention_dropout=0.0)
+    attention.sample_seed = 0
+    sample_k, n_top = sample_sizes(args.factor, L, L)
+    if args.case == 'legacy':
+        run = lambda: legacy_prob_QK(attention, Q, K, sample_k, n_top)
+    else:
+        run = lambda: attention._prob_QK(Q, K, sample_k, n_top)
+
+    if device.type == 'cuda':
+        torch.cuda.synchronize()
+        torch.cuda.reset_peak_memory_stats()
+        baseline = torch.cuda.memory_allocated()
+    else:
+        baseline = peak_rss_bytes()
+    timings = []
+    with torch.no_grad():
+        for i in range(args.iterations + 1):
+            start = time.perf_counter()
+            scores, index = run()
+            if device.type == 'cuda':
+                torch.cuda.synchronize()
+            # 第一次调用不计时
+            if i > 0:
+                timings.append(time.perf_counter() - start)
+    if device.type == 'cuda':
+        peak = torch.cuda.max_memory_allocated() - baseline
+    else:
+        peak = peak_rss_bytes() - baseline
+    print(json.dumps({
+        'case': args.case,
+        'seq_len': L,
+        'sample_k': sample_k,
+        'peak_bytes': peak,
+        'mean_ms': round(float(np.mean(timings)) * 1000, 3),
+        'checksum': float(scores.double().sum()),
+        'index_checksum': int(index.sum())
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark peak memory and runtime of ProbAttention._prob_QK')
+    parser.add_argument('--seq-lens', type=str, default='96,192,384,768,1536,2048', help='sequence lengths')
+    parser.add_argument('--batch-size', type=int, default=32, help='batch size')
+    parser.add_argument('--heads', type=int, default=8, help='number of heads')
+    parser.add_argument('--head-dim', type=int, default=16, help='dimension per head (d_model / n_heads)')
+    parser.add_argument('--factor', type=int, default=5, help='probsparse attn factor')
+    parser.add_argument('--iterations', type=int, default=10, help='timed calls per case')
+    parser.add_argument('--threads', type=int, default=None, help='torch intra-op threads')
+    parser.add_argument('--device', type=str, default='cpu', help='cpu or cuda')
+    parser.add_argument('--output', type=str, default=None, help='save results as json')
+    parser.add_argument('--case', type=str, default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--case-seq-len', type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        run_case(args)
+        return
+
+    results = []
+    for seq_len in (int(length) for length in args.seq_lens.split(',')):
+        row = {'seq_len': seq_len}
+        for case in ('legacy', 'chunked'):
+            command = [sys.executable, os.path.abspath(__file__), '--case', case, '--case-seq-len', str(seq_len)] + [
+                f'--{name}={value}' for name, value in (
+                    ('batch-size', args.batch_size), ('heads', args.heads), ('head-dim', args.head_dim),
+                    ('factor', args.factor), ('iterations', args.iterations), ('device', args.device))]
+            if args.threads:
+                command.append(f'--threads={args.threads}')
+            completed = subprocess.run(command, capture_output=True, text=True,
+                                       cwd=os.path.dirname(os.path.abspath(__file__)))
+            if completed.returncode != 0:
+                row[case] = {'error': completed.stderr.strip().splitlines()[-1:]}
+                continue
+            row[case] = json.loads(completed.stdout.strip().splitlines()[-1])
+        if 'checksum' in row.get('legacy', {}) and 'checksum' in row.get('chunked', {}):
+            row['same_output'] = (row['legacy']['index_checksum'] == row['chunked']['index_checksum']
+                                  and np.isclose(row['legacy']['checksum'], row['chunked']['checksum']))
+        results.append(row)
+        legacy, chunked = row.get('legacy', {}), row.get('chunked', {})
+        print(f"seq_len={seq_len:5d} | legacy: {legacy.get('peak_bytes', 0) / 2 ** 20:9.1f}MB "
+              f"{legacy.get('mean_ms', float('nan')):9.2f}ms | chunked: {chunked.get('peak_bytes', 0) / 2 ** 20:9.1f}MB "
+              f"{chunked.get('mean_ms', float('nan')):9.2f}ms | same output: {row.get('same_output')}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, default=bool)
+
+
+if __name__ == '__main__':
+    main()
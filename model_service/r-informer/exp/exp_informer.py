@@ -124,38 +124,42 @@ class Exp_Informer(Exp_Basic):
         print(f"Test metrics saved to {filename}")
 
     def _build_model(self):
+        model = self._build_informer(self.args)
+
+        if self.args.use_multi_gpu and self.args.use_gpu:
+            model = nn.DataParallel(model, device_ids=self.args.device_ids)
+        return model
+
+    def _build_informer(self, args):
         model_dict = {
             'informer': Informer,
             'informerstack': InformerStack,
         }
-        if self.args.model == 'informer' or self.args.model == 'informerstack':
-            e_layers = self.args.e_layers if self.args.model == 'informer' else self.args.s_layers
-            model = model_dict[self.args.model](
-                self.args.enc_in,
-                self.args.dec_in,
-                self.args.c_out,
-                self.args.seq_len,
-                self.args.label_len,
-                self.args.pred_len,
-                self.args.factor,
-                self.args.d_model,
-                self.args.n_heads,
-                e_layers,  # self.args.e_layers,
-                self.args.d_layers,
-                self.args.d_ff,
-                self.args.dropout,
-                self.args.attn,
-                self.args.embed,
-                self.args.freq,
-                self.args.activation,
-                self.args.output_attention,
-                self.args.distil,
-                self.args.mix,
+        if args.model == 'informer' or args.model == 'informerstack':
+            e_layers = args.e_layers if args.model == 'informer' else args.s_layers
+            model = model_dict[args.model](
+                args.enc_in,
+                args.dec_in,
+                args.c_out,
+                args.seq_len,
+                args.label_len,
+                args.pred_len,
+                args.factor,
+                args.d_model,
+                args.n_heads,
+                e_layers,  # args.e_layers,
+                args.d_layers,
+                args.d_ff,
+                args.dropout,
+                args.attn,
+                args.embed,
+                args.freq,
+                args.activation,
+                args.output_attention,
+                args.distil,
+                args.mix,
                 self.device
             ).float()
-
-        if self.args.use_multi_gpu and self.args.use_gpu:
-            model = nn.DataParallel(model, device_ids=self.args.device_ids)
         return model
 
     def _get_data(self, flag):
@@ -310,6 +314,130 @@ class Exp_Informer(Exp_Basic):
         self.save_losses(filename=os.path.join(self.args.checkpoints, setting, "losses.json"))
         return self.model
 
+    def _load_teacher(self, teacher_args, teacher_path):
+        """构建教师模型并加载权重，兼容多GPU训练保存的module.前缀"""
+        teacher = self._build_informer(teacher_args).to(self.device)
+        state_dict = torch.load(teacher_path, map_location=self.device)
+        if all(key.startswith('module.') for key in state_dict.keys()):
+            state_dict = {key[len('module.'):]: value for key, value in state_dict.items()}
+        teacher.load_state_dict(state_dict)
+        teacher.eval()
+        for param in teacher.parameters():
+            param.requires_grad = False
+        return teacher
+
+    def distill(self, setting, teacher_args, teacher_path):
+        """
+        知识蒸馏：以教师模型在训练窗口上的输出为目标训练当前(学生)模型
+        损失为 distill_alpha * MSE(学生, 教师) + (1 - distill_alpha) * MSE(学生, 真实值)，
+        早停和保存的最优权重按测试集上与真实值的损失判断
+        :param setting: 学生模型的setting，权重保存为checkpoints/<setting>/checkpoint.pth，可直接被服务加载
+        :param teacher_args: 教师模型参数，除模型规模外与学生一致
+        :param teacher_path: 教师模型权重文件
+        :return: 学生模型
+        """
+        teacher = self._load_teacher(teacher_args, teacher_path)
+        train_data, train_loader = self._get_data(flag='train')
+        test_data, test_loader = self._get_data(flag='test')
+
+        path = os.path.join(self.args.checkpoints, setting)
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        early_stopping = EarlyStopping(patience=self.args.patience, verbose=True)
+        model_optim = self._select_optimizer()
+        criterion = self._select_criterion()
+        alpha = self.args.distill_alpha
+
+        for epoch in range(self.args.train_epochs):
+            train_loss = []
+
+            self.model.train()
+            epoch_time = time.time()
+            for i, (batch_x, batch_y, batch_x_mark, batch_y_mark) in enumerate(train_loader):
+                model_optim.zero_grad()
+                with torch.no_grad():
+                    target, _ = self._process_one_batch(
+                        train_data, batch_x, batch_y, batch_x_mark, batch_y_mark, model=teacher)
+                pred, true = self._process_one_batch(
+                    train_data, batch_x, batch_y, batch_x_mark, batch_y_mark)
+
+                loss = alpha * criterion(pred, target) + (1 - alpha) * criterion(pred, true)
+                train_loss.append(loss.item())
+
+                if (i + 1) % 100 == 0:
+                    print("\titers: {0}, epoch: {1} | distill loss: {2:.7f}".format(i + 1, epoch + 1, loss.item()))
+
+                loss.backward()
+                model_optim.step()
+
+            print("Epoch: {} cost time: {}".format(epoch + 1, time.time() - epoch_time))
+            train_loss = np.average(train_loss)
+            test_loss = self.vali(test_data, test_loader, criterion)
+
+            self.train_losses.append(train_loss)
+            self.test_losses.append(test_loss)
+
+            print("Epoch: {0} | Distill Loss: {1:.7f} Test Loss: {2:.7f}".format(epoch + 1, train_loss, test_loss))
+            early_stopping(test_loss, self.model, path)
+            if early_stopping.early_stop:
+                print("Early stopping")
+                break
+            adjust_learning_rate(model_optim, epoch + 1, self.args)
+
+        self.model.load_state_dict(torch.load(os.path.join(path, 'checkpoint.pth'), map_location=self.device))
+        self.save_losses(filename=os.path.join(path, "losses.json"))
+        self.distill_report(setting, teacher, test_data, test_loader)
+        return self.model
+
+    def _latency(self, model, dataset_object, batch, repeats=20):
+        """重复前向计算的平均耗时(毫秒)，第一次调用不计时"""
+        timings = []
+        with torch.no_grad():
+            for i in range(repeats + 1):
+                start = time.time()
+                self._process_one_batch(dataset_object, *batch, model=model)
+                if self.args.use_gpu:
+                    torch.cuda.synchronize()
+                if i > 0:
+                    timings.append(time.time() - start)
+        return float(np.mean(timings)) * 1000
+
+    def distill_report(self, setting, teacher, test_data, test_loader):
+        """
+        在测试集上比较教师模型和学生模型的参数量、精度和推理延迟，保存为checkpoints/<setting>/distill_report.json
+        延迟分别按单个窗口和一个测试批次测量
+        """
+        batch = next(iter(test_loader))
+        window = [item[:1] for item in batch]
+        report = {}
+        for name, model in (('teacher', teacher), ('student', self.model)):
+            model.eval()
+            preds, trues = [], []
+            with torch.no_grad():
+                for batch_x, batch_y, batch_x_mark, batch_y_mark in test_loader:
+                    pred, true = self._process_one_batch(
+                        test_data, batch_x, batch_y, batch_x_mark, batch_y_mark, model=model)
+                    preds.append(pred.detach().cpu().numpy())
+                    trues.append(true.detach().cpu().numpy())
+            mae, mse, rmse = metric(np.concatenate(preds), np.concatenate(trues))[:3]
+            report[name] = {
+                'parameters': sum(param.numel() for param in model.parameters()),
+                'mae': mae,
+                'mse': mse,
+                'rmse': rmse,
+                'window_latency_ms': self._latency(model, test_data, window),
+                'batch_latency_ms': self._latency(model, test_data, batch)
+            }
+            print('{}: {}'.format(name, report[name]))
+
+        report = self.convert_to_serializable(report)
+        filename = os.path.join(self.args.checkpoints, setting, "distill_report.json")
+        with open(filename, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"Distill report saved to {filename}")
+        return report
+
     def test(self, setting):
         test_data, test_loader = self._get_data(flag='test')
 
@@ -392,7 +520,8 @@ class Exp_Informer(Exp_Basic):
 
         return
 
-    def _process_one_batch(self, dataset_object, batch_x, batch_y, batch_x_mark, batch_y_mark):
+    def _process_one_batch(self, dataset_object, batch_x, batch_y, batch_x_mark, batch_y_mark, model=None):
+        model = self.model if model is None else model
         batch_x = batch_x.float().to(self.device)
         batch_y = batch_y.float()
 
@@ -409,14 +538,14 @@ class Exp_Informer(Exp_Basic):
         if self.args.use_amp:
             with torch.cuda.amp.autocast():
                 if self.args.output_attention:
-                    outputs = self.model(batch_x, batch_x_mark, dec_inp, batch_y_mark)[0]
+                    outputs = model(batch_x, batch_x_mark, dec_inp, batch_y_mark)[0]
                 else:
-                    outputs = self.model(batch_x, batch_x_mark, dec_inp, batch_y_mark)
+                    outputs = model(batch_x, batch_x_mark, dec_inp, batch_y_mark)
         else:
             if self.args.output_attention:
-                outputs = self.model(batch_x, batch_x_mark, dec_inp, batch_y_mark)[0]
+                outputs = model(batch_x, batch_x_mark, dec_inp, batch_y_mark)[0]
             else:
-                outputs = self.model(batch_x, batch_x_mark, dec_inp, batch_y_mark)
+                outputs = model(batch_x, batch_x_mark, dec_inp, batch_y_mark)
         if self.args.inverse:
             outputs = dataset_object.inverse_transform(outputs)
         f_dim = -1 if self.args.features == 'MS' else 0
@@ -36,7 +36,7 @@ parser.add_argument('--factor', type=int, default=5, help='probsparse attn facto
 parser.add_argument('--padding', type=int, default=0, help='padding type')
 parser.add_argument('--distil', action='store_false',help='whether to use distilling in encoder, using this argument means not using distilling',default=True)
 parser.add_argument('--dropout', type=float, default=0.3, help='dropout')
-parser.add_argument('--attn', type=str, default='prob', help='attention used in encoder, options:[prob, full]')
+parser.add_argument('--attn', type=str, default='prob', help='attention used in encoder, options:[prob, full, full_fused]')
 parser.add_argument('--embed', type=str, default='timeF',help='time features encoding, options:[timeF, fixed, learned]')
 parser.add_argument('--activation', type=str, default='tanh', help='activation')
 parser.add_argument('--output_attention', action='store_true', help='whether to output attention in encoder')
@@ -55,6 +55,15 @@ parser.add_argument('--lradj', type=str, default='type1', help='adjust learning
 parser.add_argument('--use_amp', action='store_true', help='use automatic mixed precision training', default=False)
 parser.add_argument('--inverse', action='store_true', help='inverse output data', default=False)
 
+parser.add_argument('--distill', action='store_true', help='train the model as a student on the outputs of a teacher checkpoint', default=False)
+parser.add_argument('--teacher_checkpoint', type=str, default=None, help='teacher weights file used with --distill')
+parser.add_argument('--teacher_d_model', type=int, default=128, help='dimension of the teacher model')
+parser.add_argument('--teacher_n_heads', type=int, default=8, help='num of heads of the teacher model')
+parser.add_argument('--teacher_e_layers', type=int, default=2, help='num of encoder layers of the teacher model')
+parser.add_argument('--teacher_d_layers', type=int, default=1, help='num of decoder layers of the teacher model')
+parser.add_argument('--teacher_d_ff', type=int, default=2048, help='dimension of fcn of the teacher model')
+parser.add_argument('--distill_alpha', type=float, default=1.0, help='weight of the teacher outputs in the distillation loss, the rest goes to the ground truth')
+
 parser.add_argument('--use_gpu', type=bool, default=True, help='use gpu')
 parser.add_argument('--gpu', type=int, default=1, help='gpu')
 parser.add_argument('--use_multi_gpu', action='store_true', help='use multiple gpus', default=True)
@@ -93,6 +102,9 @@ args.s_layers = [int(s_l) for s_l in args.s_layers.replace(' ', '').split(',')]
 args.detail_freq = args.freq
 args.freq = args.freq[-1:]
 
+if args.distill and not args.teacher_checkpoint:
+    parser.error('--distill requires --teacher_checkpoint')
+
 print('Args in experiment:')
 print(args)
 
@@ -119,8 +131,19 @@ for ii in range(args.itr):
                                                                                                          args.des, ii)
 
     exp = Exp(args)  # set experiments
-    print('>>>>>>>start training : {}>>>>>>>>>>>>>>>>>>>>>>>>>>'.format(setting))
-    exp.train(setting)
+    if args.distill:
+        # 命令行中的模型规模参数描述学生模型，教师模型只替换规模参数
+        teacher_args = argparse.Namespace(**vars(args))
+        teacher_args.d_model = args.teacher_d_model
+        teacher_args.n_heads = args.teacher_n_heads
+        teacher_args.e_layers = args.teacher_e_layers
+        teacher_args.d_layers = args.teacher_d_layers
+        teacher_args.d_ff = args.teacher_d_ff
+        print('>>>>>>>start distilling : {}>>>>>>>>>>>>>>>>>>>>>>>>>>'.format(setting))
+        exp.distill(setting, teacher_args, args.teacher_checkpoint)
+    else:
+        print('>>>>>>>start training : {}>>>>>>>>>>>>>>>>>>>>>>>>>>'.format(setting))
+        exp.train(setting)
 
     print('>>>>>>>testing : {}<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<'.format(setting))
     exp.test(setting)
@@ -7,15 +7,44 @@ import numpy as np
 from math import sqrt
 from utils.masking import TriangularCausalMask, ProbMask
 
+# _prob_QK每块采样key的元素数上限(B * H * 块内query数 * sample_k * E)，约16MB的float32
+SAMPLE_CHUNK_ELEMENTS = 1 << 22
+
+# PyTorch 2.0起提供融合的scaled_dot_product_attention
+FUSED_ATTENTION_AVAILABLE = hasattr(F, 'scaled_dot_product_attention')
+
+
 class FullAttention(nn.Module):
-    def __init__(self, mask_flag=True, factor=5, scale=None, attention_dropout=0.1, output_attention=False):
+    def __init__(self, mask_flag=True, factor=5, scale=None, attention_dropout=0.1, output_attention=False, fused=False):
         super(FullAttention, self).__init__()
         self.scale = scale
         self.mask_flag = mask_flag
         self.output_attention = output_attention
         self.dropout = nn.Dropout(attention_dropout)
-        
+        # 使用融合的scaled_dot_product_attention，需要返回注意力矩阵时仍使用下面的实现
+        self.fused = fused
+
+    def _fused_forward(self, queries, keys, values, attn_mask):
+        # scaled_dot_product_attention的输入为[B, H, L, E]，布尔掩码中True表示参与计算，与attn_mask相反；
+        # 与下面的实现相同，mask_flag为False时忽略传入的掩码
+        mask, is_causal = None, False
+        if self.mask_flag:
+            if attn_mask is not None:
+                mask = ~attn_mask.mask
+            else:
+                is_causal = True
+        # scale参数需要PyTorch 2.1，改为先缩放query，使默认的1/sqrt(E)缩放后等于self.scale
+        if self.scale:
+            queries = queries * (self.scale * sqrt(queries.shape[-1]))
+        V = F.scaled_dot_product_attention(
+            queries.transpose(1, 2), keys.transpose(1, 2), values.transpose(1, 2), attn_mask=mask,
+            dropout_p=self.dropout.p if self.training else 0.0, is_causal=is_causal)
+        return (V.transpose(1, 2).contiguous(), None)
+
     def forward(self, queries, keys, values, attn_mask):
+        if self.fused and not self.output_attention and FUSED_ATTENTION_AVAILABLE:
+            return self._fused_forward(queries, keys, values, attn_mask)
+
         B, L, H, E = queries.shape
         _, S, _, D = values.shape
         scale = self.scale or 1./sqrt(E)
@@ -43,6 +72,16 @@ class ProbAttention(nn.Module):
         self.mask_flag = mask_flag
         self.output_attention = output_attention
         self.dropout = nn.Dropout(attention_dropout)
+        # 设置后每次使用相同的采样位置，导出ONNX等静态计算图时使用
+        self.sample_seed = None
+        self.sample_chunk_elements = SAMPLE_CHUNK_ELEMENTS
+
+    def _sample_index(self, L_K, L_Q, sample_k):
+        if self.sample_seed is None:
+            return torch.randint(L_K, (L_Q, sample_k))
+        # 固定的采样位置在导出时作为常量写入计算图
+        rng = np.random.RandomState(self.sample_seed)
+        return torch.from_numpy(rng.randint(L_K, size=(L_Q, sample_k)).astype(np.int64))
 
     def _prob_QK(self, Q, K, sample_k, n_top): # n_top: c*ln(L_q)
         # Q [B, H, L, D]
@@ -50,19 +89,22 @@ class ProbAttention(nn.Module):
         _, _, L_Q, _ = Q.shape
 
         # calculate the sampled Q_K
-        K_expand = K.unsqueeze(-3).expand(B, H, L_Q, L_K, E)
-        index_sample = torch.randint(L_K, (L_Q, sample_k)) # real U = U_part(factor*ln(L_k))*L_q
-        K_sample = K_expand[:, :, torch.arange(L_Q).unsqueeze(1), index_sample, :]
-        Q_K_sample = torch.matmul(Q.unsqueeze(-2), K_sample.transpose(-2, -1)).squeeze(-2)
-
-        # find the Top_k query with sparisty measurement
-        M = Q_K_sample.max(-1)[0] - torch.div(Q_K_sample.sum(-1), L_K)
+        index_sample = self._sample_index(L_K, L_Q, sample_k).to(K.device) # real U = U_part(factor*ln(L_k))*L_q
+        # 按query分块直接从K中取出采样的key，不展开K；每块的[B, H, chunk, sample_k, E]副本大小有上限，
+        # 峰值内存不再随L_Q增长。每个query的得分计算与整体计算相同
+        chunk = max(1, self.sample_chunk_elements // (B * H * sample_k * E))
+        M = []
+        for start in range(0, L_Q, chunk):
+            K_sample = K[:, :, index_sample[start:start + chunk], :]
+            Q_K_sample = torch.matmul(Q[:, :, start:start + chunk].unsqueeze(-2), K_sample.transpose(-2, -1)).squeeze(-2)
+            # find the Top_k query with sparisty measurement
+            M.append(Q_K_sample.max(-1)[0] - torch.div(Q_K_sample.sum(-1), L_K))
+        M = torch.cat(M, dim=-1) if len(M) > 1 else M[0]
         M_top = M.topk(n_top, sorted=False)[1]
 
         # use the reduced Q to calculate Q_K
-        Q_reduce = Q[torch.arange(B)[:, None, None],
-                     torch.arange(H)[None, :, None],
-                     M_top, :] # factor*ln(L_q)
+        # 用gather代替按torch.arange(B)的高级索引，torch.jit.trace追踪后批大小仍是动态的
+        Q_reduce = Q.gather(2, M_top.unsqueeze(-1).expand(-1, -1, -1, E)) # factor*ln(L_q)
         Q_K = torch.matmul(Q_reduce, K.transpose(-2, -1)) # factor*ln(L_q)*L_k
 
         return Q_K, M_top
@@ -87,12 +129,11 @@ class ProbAttention(nn.Module):
 
         attn = torch.softmax(scores, dim=-1) # nn.Softmax(dim=-1)(scores)
 
-        context_in[torch.arange(B)[:, None, None],
-                   torch.arange(H)[None, :, None],
-                   index, :] = torch.matmul(attn, V).type_as(context_in)
+        # index为topk的结果，同一(b, h)内不重复，scatter_与按index赋值相同
+        context_in.scatter_(2, index.unsqueeze(-1).expand(-1, -1, -1, D), torch.matmul(attn, V).type_as(context_in))
         if self.output_attention:
             attns = (torch.ones([B, H, L_V, L_V])/L_V).type_as(attn).to(attn.device)
-            attns[torch.arange(B)[:, None, None], torch.arange(H)[None, :, None], index, :] = attn
+            attns.scatter_(2, index.unsqueeze(-1).expand(-1, -1, -1, L_V), attn)
             return (context_in, attns)
         else:
             return (context_in, None)
@@ -105,8 +146,9 @@ class ProbAttention(nn.Module):
         keys = keys.transpose(2,1)
         values = values.transpose(2,1)
 
-        U_part = self.factor * np.ceil(np.log(L_K)).astype('int').item() # c*ln(L_k)
-        u = self.factor * np.ceil(np.log(L_Q)).astype('int').item() # c*ln(L_q) 
+        # torch.jit.trace追踪时shape中的长度为张量，先转为int；导出的计算图中采样数为常量
+        U_part = self.factor * int(np.ceil(np.log(int(L_K)))) # c*ln(L_k)
+        u = self.factor * int(np.ceil(np.log(int(L_Q)))) # c*ln(L_q) 
 
         U_part = U_part if U_part<L_K else L_K
         u = u if u<L_Q else L_Q
@@ -125,37 +167,63 @@ class ProbAttention(nn.Module):
         return context.transpose(2,1).contiguous(), attn
 
 
+def fix_sampling(model, seed=0):
+    """让模型中所有ProbAttention使用固定的采样位置"""
+    for module in model.modules():
+        if isinstance(module, ProbAttention):
+            module.sample_seed = seed
+
+
+def use_fused_attention(model, enabled=True):
+    """让模型中所有FullAttention(包括解码器的交叉注意力)使用融合的scaled_dot_product_attention，参数不变"""
+    for module in model.modules():
+        if isinstance(module, FullAttention):
+            module.fused = enabled
+
+
 class AttentionLayer(nn.Module):
     def __init__(self, attention, d_model, n_heads,
-                 d_keys=None, d_values=None, mix=False):
+                 d_keys=None, d_values=None, mix=False, input_dim=None):
         super(AttentionLayer, self).__init__()
 
         d_keys = d_keys or (d_model // n_heads)
         d_values = d_values or (d_model // n_heads)
 
         self.inner_attention = attention
-        # 使用动态适应输入维度
-        self.query_projection = nn.Linear(d_model, d_keys * n_heads)
-        self.key_projection = nn.Linear(d_model, d_keys * n_heads)
-        self.value_projection = nn.Linear(d_model, d_values * n_heads)
-        self.out_projection = nn.Linear(d_values * n_heads, d_model)
         self.n_heads = n_heads
         self.mix = mix
         self.d_model = d_model
         self.d_keys = d_keys
         self.d_values = d_values
+        # 输入维度在构建模型或加载权重时确定，默认为d_model
+        self._build_projections(input_dim or d_model)
+
+    def _build_projections(self, input_dim, device=None):
+        self.input_dim = input_dim
+        self.query_projection = nn.Linear(input_dim, self.d_keys * self.n_heads)
+        self.key_projection = nn.Linear(input_dim, self.d_keys * self.n_heads)
+        self.value_projection = nn.Linear(input_dim, self.d_values * self.n_heads)
+        self.out_projection = nn.Linear(self.d_values * self.n_heads, input_dim)
+        if device is not None:
+            for projection in (self.query_projection, self.key_projection, self.value_projection, self.out_projection):
+                projection.to(device)
+
+    def _load_from_state_dict(self, state_dict, prefix, local_metadata, strict,
+                              missing_keys, unexpected_keys, error_msgs):
+        # 权重中的投影层按其他输入维度训练时，按权重的形状重建投影层，再由子模块正常加载训练好的参数
+        weight = state_dict.get(prefix + 'query_projection.weight')
+        if weight is not None and weight.dim() == 2 and weight.shape[1] != self.input_dim:
+            self._build_projections(weight.shape[1], self.query_projection.weight.device)
+        super(AttentionLayer, self)._load_from_state_dict(
+            state_dict, prefix, local_metadata, strict, missing_keys, unexpected_keys, error_msgs)
 
     def forward(self, queries, keys, values, attn_mask):
         B, L, input_dim = queries.shape
         _, S, _ = keys.shape
         H = self.n_heads
 
-        # 如果输入维度与预期不同，调整投影层
-        if input_dim != self.d_model:
-            self.query_projection = nn.Linear(input_dim, self.d_keys * H).to(queries.device)
-            self.key_projection = nn.Linear(input_dim, self.d_keys * H).to(keys.device)
-            self.value_projection = nn.Linear(input_dim, self.d_values * H).to(values.device)
-            self.out_projection = nn.Linear(self.d_values * H, input_dim).to(queries.device)
+        if input_dim != self.input_dim:
+            raise ValueError(f'AttentionLayer输入维度为{input_dim}，与构建模型或加载权重时确定的{self.input_dim}不一致')
 
         queries = self.query_projection(queries).view(B, L, H, -1)
         keys = self.key_projection(keys).view(B, S, H, -1)
@@ -216,18 +216,16 @@ class LocalRNN(nn.Module):
         self.dropout = nn.Dropout(dropout)
 
     def forward(self, x):
-        batch_size, seq_len, _ = x.size()
-        outputs = []
-        for i in range(0, seq_len, self.ksize):
-            x_chunk = x[:, i:i+self.ksize, :]
-            if x_chunk.size(1) < self.ksize:
-                padding = torch.zeros(batch_size, self.ksize - x_chunk.size(1), x_chunk.size(2)).to(x.device)
-                x_chunk = torch.cat([x_chunk, padding], dim=1)
-            output, _ = self.rnn(x_chunk)
-            # # 应用投影层
-            # output = self.projection(output)
-            outputs.append(output)
-
-        outputs = torch.cat(outputs, dim=1)
+        _, seq_len, input_size = x.size()
+        n_chunks = (seq_len + self.ksize - 1) // self.ksize
+        # 末尾补零到ksize的整数倍，每个长度为ksize的块作为一条独立序列，
+        # 所有块合并成[B * n_chunks, ksize, D]只调用一次RNN，与逐块调用的结果相同
+        padding = n_chunks * self.ksize - seq_len
+        if padding:
+            x = F.pad(x, (0, 0, 0, padding))
+        output, _ = self.rnn(x.reshape(-1, self.ksize, input_size))
+        # # 应用投影层
+        # output = self.projection(output)
+        outputs = output.reshape(-1, n_chunks * self.ksize, output.size(-1))
         outputs = outputs[:, :seq_len, :]
         return self.dropout(outputs)
\ No newline at end of file
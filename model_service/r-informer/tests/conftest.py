@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 测试按r-informer目录下的包名导入(models、utils等)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
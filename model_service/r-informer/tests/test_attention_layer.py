@@ -0,0 +1,36 @@
+import pytest
+import torch
+
+from models.attn import AttentionLayer, FullAttention
+
+
+def build(d_model=32, n_heads=4, input_dim=None):
+    return AttentionLayer(FullAttention(False, attention_dropout=0.0), d_model, n_heads, input_dim=input_dim).eval()
+
+
+def test_forward_keeps_trained_projections():
+    layer = build()
+    weight = layer.query_projection.weight
+    x = torch.randn(2, 6, 32)
+    with torch.no_grad():
+        first = layer(x, x, x, None)[0]
+        second = layer(x, x, x, None)[0]
+    assert layer.query_projection.weight is weight
+    assert torch.equal(first, second)
+
+
+def test_unexpected_input_dim_raises():
+    layer = build()
+    x = torch.randn(2, 6, 24)
+    with pytest.raises(ValueError):
+        layer(x, x, x, None)
+
+
+def test_load_adapts_to_checkpoint_input_dim():
+    trained = build(input_dim=24)
+    layer = build()
+    layer.load_state_dict(trained.state_dict())
+    assert layer.input_dim == 24
+    x = torch.randn(2, 6, 24)
+    with torch.no_grad():
+        assert torch.equal(layer(x, x, x, None)[0], trained(x, x, x, None)[0])
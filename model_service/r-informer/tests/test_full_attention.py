@@ -0,0 +1,37 @@
+import pytest
+import torch
+
+from models.attn import FullAttention, FUSED_ATTENTION_AVAILABLE
+from utils.masking import TriangularCausalMask
+
+pytestmark = pytest.mark.skipif(not FUSED_ATTENTION_AVAILABLE, reason='需要PyTorch 2.0及以上版本')
+
+
+def pair(mask_flag, scale=None):
+    eager = FullAttention(mask_flag, scale=scale, attention_dropout=0.0).eval()
+    fused = FullAttention(mask_flag, scale=scale, attention_dropout=0.0, fused=True).eval()
+    return eager, fused
+
+
+def inputs(L, S, B=2, H=4, E=8):
+    generator = torch.Generator().manual_seed(0)
+    return (torch.randn(B, L, H, E, generator=generator), torch.randn(B, S, H, E, generator=generator),
+            torch.randn(B, S, H, E, generator=generator))
+
+
+@pytest.mark.parametrize('mask_flag, L, S', [(True, 12, 12), (False, 12, 12), (False, 7, 12)])
+@pytest.mark.parametrize('scale', [None, 0.5])
+def test_fused_matches_eager(mask_flag, L, S, scale):
+    eager, fused = pair(mask_flag, scale)
+    q, k, v = inputs(L, S)
+    with torch.no_grad():
+        assert torch.allclose(eager(q, k, v, None)[0], fused(q, k, v, None)[0], atol=1e-5)
+
+
+@pytest.mark.parametrize('mask_flag', [True, False])
+def test_explicit_mask_only_applies_with_mask_flag(mask_flag):
+    eager, fused = pair(mask_flag)
+    q, k, v = inputs(12, 12)
+    mask = TriangularCausalMask(2, 12)
+    with torch.no_grad():
+        assert torch.allclose(eager(q, k, v, mask)[0], fused(q, k, v, mask)[0], atol=1e-5)
@@ -0,0 +1,30 @@
+import pytest
+import torch
+
+from models.embed import LocalRNN
+
+
+def chunk_loop(layer, x):
+    """原先逐块调用RNN的实现"""
+    batch_size, seq_len, _ = x.size()
+    outputs = []
+    for i in range(0, seq_len, layer.ksize):
+        x_chunk = x[:, i:i + layer.ksize, :]
+        if x_chunk.size(1) < layer.ksize:
+            padding = torch.zeros(batch_size, layer.ksize - x_chunk.size(1), x_chunk.size(2))
+            x_chunk = torch.cat([x_chunk, padding], dim=1)
+        output, _ = layer.rnn(x_chunk)
+        outputs.append(output)
+    return torch.cat(outputs, dim=1)[:, :seq_len, :]
+
+
+@pytest.mark.parametrize('rnn_type', ['GRU', 'LSTM', 'RNN'])
+@pytest.mark.parametrize('seq_len', [96, 50, 3])
+def test_single_call_matches_chunk_loop(rnn_type, seq_len):
+    torch.manual_seed(0)
+    layer = LocalRNN(8, 16, rnn_type, ksize=6, dropout=0.0).eval()
+    x = torch.randn(3, seq_len, 8)
+    with torch.no_grad():
+        output = layer(x)
+        assert output.shape == (3, seq_len, 16)
+        assert torch.allclose(output, chunk_loop(layer, x), atol=1e-6)
@@ -0,0 +1,41 @@
+import torch
+
+from utils.masking import TriangularCausalMask, ProbMask
+
+
+def reference_prob_mask(B, H, L, index, scores):
+    """原先的实现：构造L×S的上三角掩码，展开后按index索引"""
+    _mask = torch.ones(L, scores.shape[-1], dtype=torch.bool).triu(1)
+    _mask_ex = _mask[None, None, :].expand(B, H, L, scores.shape[-1])
+    indicator = _mask_ex[torch.arange(B)[:, None, None], torch.arange(H)[None, :, None], index, :]
+    return indicator.view(scores.shape)
+
+
+def test_prob_mask_matches_triu_mask():
+    torch.manual_seed(0)
+    B, H, L, u = 3, 4, 72, 25
+    index = torch.stack([torch.randperm(L)[:u] for _ in range(B * H)]).view(B, H, u)
+    scores = torch.randn(B, H, u, L)
+    mask = ProbMask(B, H, L, index, scores).mask
+    assert mask.shape == scores.shape
+    assert torch.equal(mask, reference_prob_mask(B, H, L, index, scores))
+
+
+def test_triangular_causal_mask_matches_triu():
+    B, L = 2, 10
+    expected = torch.triu(torch.ones([B, 1, L, L], dtype=torch.bool), diagonal=1)
+    assert torch.equal(TriangularCausalMask(B, L).mask, expected)
+
+
+def test_masks_are_cached_per_shape_and_device():
+    first = TriangularCausalMask(2, 16).mask
+    second = TriangularCausalMask(5, 16, device='cpu').mask
+    assert first.data_ptr() == second.data_ptr()
+    assert TriangularCausalMask(2, 17).mask.data_ptr() != first.data_ptr()
+
+
+def test_cached_mask_usable_in_training():
+    scores = torch.randn(2, 3, 8, 8, requires_grad=True)
+    masked = scores.masked_fill(TriangularCausalMask(2, 8).mask, -1e9)
+    torch.softmax(masked, dim=-1).sum().backward()
+    assert scores.grad is not None
@@ -0,0 +1,39 @@
+import pytest
+import torch
+
+from models.attn import ProbAttention
+
+
+def expand_prob_QK(attention, Q, K, sample_k, n_top):
+    """原先先expand K再整体索引的实现"""
+    B, H, L_K, E = K.shape
+    _, _, L_Q, _ = Q.shape
+    K_expand = K.unsqueeze(-3).expand(B, H, L_Q, L_K, E)
+    index_sample = attention._sample_index(L_K, L_Q, sample_k)
+    K_sample = K_expand[:, :, torch.arange(L_Q).unsqueeze(1), index_sample, :]
+    Q_K_sample = torch.matmul(Q.unsqueeze(-2), K_sample.transpose(-2, -1)).squeeze(-2)
+    M = Q_K_sample.max(-1)[0] - torch.div(Q_K_sample.sum(-1), L_K)
+    M_top = M.topk(n_top, sorted=False)[1]
+    Q_reduce = Q[torch.arange(B)[:, None, None], torch.arange(H)[None, :, None], M_top, :]
+    return torch.matmul(Q_reduce, K.transpose(-2, -1)), M_top
+
+
+def sorted_by_index(Q_K, M_top):
+    order = M_top.argsort(-1)
+    return Q_K.gather(-2, order.unsqueeze(-1).expand_as(Q_K)), M_top.gather(-1, order)
+
+
+@pytest.mark.parametrize('chunk_elements', [1, 1000, 1 << 24])
+@pytest.mark.parametrize('L_Q, L_K', [(96, 96), (72, 48)])
+def test_chunked_sampling_matches_expanded_K(chunk_elements, L_Q, L_K):
+    generator = torch.Generator().manual_seed(0)
+    Q = torch.randn(2, 4, L_Q, 8, generator=generator)
+    K = torch.randn(2, 4, L_K, 8, generator=generator)
+    attention = ProbAttention(False, 5, attention_dropout=0.0)
+    attention.sample_seed = 0
+    attention.sample_chunk_elements = chunk_elements
+    sample_k, n_top = 20, 25
+    expected = sorted_by_index(*expand_prob_QK(attention, Q, K, sample_k, n_top))
+    actual = sorted_by_index(*attention._prob_QK(Q, K, sample_k, n_top))
+    assert torch.equal(actual[1], expected[1])
+    assert torch.allclose(actual[0], expected[0], atol=1e-6)
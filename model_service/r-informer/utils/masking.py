@@ -1,10 +1,24 @@
+import functools
+
 import torch
 
+
+# 掩码按(L, S, device)缓存，每次前向只返回缓存张量的视图；缓存的张量只读，不能原地修改
+@functools.lru_cache(maxsize=32)
+def _triu_mask(L, S, device):
+    with torch.no_grad():
+        return torch.ones(L, S, dtype=torch.bool).triu(1).to(device)
+
+
+@functools.lru_cache(maxsize=32)
+def _key_positions(S, device):
+    with torch.no_grad():
+        return torch.arange(S).to(device)
+
+
 class TriangularCausalMask():
     def __init__(self, B, L, device="cpu"):
-        mask_shape = [B, 1, L, L]
-        with torch.no_grad():
-            self._mask = torch.triu(torch.ones(mask_shape, dtype=torch.bool), diagonal=1).to(device)
+        self._mask = _triu_mask(L, L, torch.device(device))[None, None].expand(B, 1, L, L)
 
     @property
     def mask(self):
@@ -12,13 +26,10 @@ class TriangularCausalMask():
 
 class ProbMask():
     def __init__(self, B, H, L, index, scores, device="cpu"):
-        _mask = torch.ones(L, scores.shape[-1], dtype=torch.bool).to(device).triu(1)
-        _mask_ex = _mask[None, None, :].expand(B, H, L, scores.shape[-1])
-        indicator = _mask_ex[torch.arange(B)[:, None, None],
-                             torch.arange(H)[None, :, None],
-                             index, :].to(device)
-        self._mask = indicator.view(scores.shape).to(device)
-    
+        # 第index[b, h, q]个query屏蔽其后的key，直接比较位置，不构造L×S的完整掩码
+        positions = _key_positions(scores.shape[-1], torch.device(device))
+        self._mask = (positions > index.to(device).unsqueeze(-1)).view(scores.shape)
+
     @property
     def mask(self):
-        return self._mask
\ No newline at end of file
+        return self._mask
@@ -0,0 +1,94 @@
+# model_service/serve.py
+"""
+生产环境启动入口
+uvicorn作为异步前端接收连接，现有Flask应用通过a2wsgi运行在有界请求线程池中，
+前向计算再交给app.py中的有界推理执行器；/health和/ready直接在事件循环中返回，不会被慢预测阻塞
+
+用法: python serve.py --workers 2 --threads 16 --inference-threads 2
+多进程推理: python serve.py --threads 32 --inference-threads 8 --inference-processes 8 --inference-process-threads 4
+依赖: pip install uvicorn a2wsgi
+"""
+import argparse
+import json
+import os
+
+
+def build_asgi_app():
+    try:
+        from a2wsgi import WSGIMiddleware
+    except ImportError:
+        raise ImportError('生产模式需要安装a2wsgi: pip install a2wsgi')
+
+    from app import app, health_status, ready_status
+
+    wsgi_app = WSGIMiddleware(app, workers=int(os.environ.get('WSGI_THREADS', '16')))
+    return with_fast_routes(wsgi_app, {
+        '/health': lambda: (health_status(), 200),
+        '/ready': ready_status
+    })
+
+
+def with_fast_routes(wsgi_app, fast_routes):
+    """
+    :param wsgi_app: 处理其他请求的ASGI应用
+    :param fast_routes: 直接在事件循环中处理的轻量GET路由，路径到返回(结果, 状态码)的函数
+    """
+    async def asgi_app(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+
+        if scope['type'] == 'http' and scope['method'] == 'GET' and scope['path'] in fast_routes:
+            payload, status = fast_routes[scope['path']]()
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            await send({
+                'type': 'http.response.start',
+                'status': status,
+                'headers': [(b'content-type', b'application/json'),
+                            (b'content-length', str(len(body)).encode('ascii'))]
+            })
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        await wsgi_app(scope, receive, send)
+
+    return asgi_app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='R-Informer water quality prediction service (production)')
+    parser.add_argument('--host', type=str, default='0.0.0.0', help='listen host')
+    parser.add_argument('--port', type=int, default=5001, help='listen port')
+    parser.add_argument('--workers', type=int, default=1, help='number of server processes')
+    parser.add_argument('--threads', type=int, default=16, help='request threads per process')
+    parser.add_argument('--inference-threads', type=int, default=1, help='concurrent forward passes per process')
+    parser.add_argument('--inference-queue', type=int, default=64, help='queued forward passes before rejecting with 503')
+    parser.add_argument('--torch-threads', type=int, default=None, help='intra-op threads used by torch')
+    parser.add_argument('--inference-processes', type=int, default=0,
+                        help='inference worker processes sharing weights through shared memory; 0 runs forwards in-process')
+    parser.add_argument('--inference-process-threads', type=int, default=None,
+                        help='intra-op threads per inference process (default: cores / processes)')
+    args = parser.parse_args()
+
+    # app.py在导入时读取这些配置，必须在启动worker前设置
+    os.environ['WSGI_THREADS'] = str(args.threads)
+    os.environ['INFERENCE_THREADS'] = str(args.inference_threads)
+    os.environ['INFERENCE_QUEUE_SIZE'] = str(args.inference_queue)
+    if args.torch_threads is not None:
+        os.environ['TORCH_NUM_THREADS'] = str(args.torch_threads)
+    os.environ['INFERENCE_PROCESSES'] = str(args.inference_processes)
+    if args.inference_process_threads is not None:
+        os.environ['INFERENCE_PROCESS_THREADS'] = str(args.inference_process_threads)
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise ImportError('生产模式需要安装uvicorn: pip install uvicorn')
+
+    uvicorn.run('serve:build_asgi_app', factory=True, host=args.host, port=args.port,
+                workers=args.workers, log_level='info')
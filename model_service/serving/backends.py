@@ -0,0 +1,163 @@
+# model_service/serving/backends.py
+"""
+推理后端
+- eager: 直接调用PyTorch模型(默认)
+- torchscript: 加载导出的TorchScript模型，前向计算在C++中执行，不经过Python解释器，执行期间释放GIL
+- onnx: 使用ONNX Runtime在CPU上运行导出的ONNX计算图，需要安装onnxruntime
+- int8: 加载时对PyTorch模型做动态int8量化，需要量化验证报告，见serving/quantization.py
+导出文件(int8为验证报告)保存在权重文件旁边，文件名为<权重文件名><后缀>，由export_model.py生成
+"""
+import os
+
+import torch
+
+BACKENDS = ('eager', 'torchscript', 'onnx', 'int8')
+# 从导出文件加载的后端，推理子进程也从文件加载
+EXPORT_BACKENDS = ('torchscript', 'onnx')
+ARTIFACT_SUFFIXES = {'torchscript': '.torchscript.pt', 'onnx': '.onnx', 'int8': '.int8.json'}
+INPUT_NAMES = ('x_enc', 'x_mark_enc', 'x_dec', 'x_mark_dec')
+
+
+def artifact_path(weights_path, backend):
+    """导出模型的保存路径，如checkpoint.pth对应checkpoint.torchscript.pt"""
+    stem, _ = os.path.splitext(weights_path)
+    return stem + ARTIFACT_SUFFIXES[backend]
+
+
+def artifact_is_current(weights_path, backend):
+    """导出文件存在且不早于权重文件"""
+    path = artifact_path(weights_path, backend)
+    return os.path.isfile(path) and os.path.getmtime(path) >= os.path.getmtime(weights_path)
+
+
+def example_inputs(args, batch_size=1):
+    """
+    与app.py中predict_batch相同形状的示例输入
+    :return: (x_enc, x_mark_enc, x_dec, x_mark_dec)
+    """
+    return (
+        torch.randn(batch_size, args.seq_len, args.enc_in),
+        torch.zeros(batch_size, args.seq_len, 4),
+        torch.randn(batch_size, args.label_len + args.pred_len, args.dec_in),
+        torch.zeros(batch_size, args.label_len + args.pred_len, 4)
+    )
+
+
+class TensorOutput(torch.nn.Module):
+    """output_attention为True时模型返回(预测, 注意力)，导出时只保留预测结果"""
+    def __init__(self, model):
+        super(TensorOutput, self).__init__()
+        self.model = model
+
+    def forward(self, x_enc, x_mark_enc, x_dec, x_mark_dec):
+        return self.model(x_enc, x_mark_enc, x_dec, x_mark_dec)[0]
+
+
+def inference_module(model, args):
+    return TensorOutput(model) if args.output_attention else model
+
+
+def check_parity(reference, candidate, args, batch_sizes=(1, 4), seed=0):
+    """
+    比较两个模型在相同输入下的输出
+    ProbAttention按随机采样选择query，两次调用前设置相同的随机种子，采样结果一致
+    :return: 各批大小下的最大绝对误差
+    """
+    errors = {}
+    for batch_size in batch_sizes:
+        inputs = example_inputs(args, batch_size)
+        with torch.no_grad():
+            torch.manual_seed(seed)
+            expected = reference(*inputs)
+            torch.manual_seed(seed)
+            actual = candidate(*inputs)
+        errors[batch_size] = float((expected - actual).abs().max())
+    return errors
+
+
+def export_torchscript(model, args, path, batch_sizes=(1, 4), tolerance=1e-4):
+    """
+    按固定的输入长度追踪模型并保存TorchScript文件，批大小保持动态
+    :param model: eval模式的Informer/InformerStack
+    :param args: 模型参数
+    :param path: 保存路径
+    :return: 各批大小下与原模型的最大绝对误差
+    """
+    module = inference_module(model, args).eval()
+    with torch.no_grad():
+        # ProbAttention的随机采样使两次追踪结果不同，关闭trace自带的检查，改为固定随机种子后比较
+        traced = torch.jit.trace(module, example_inputs(args, batch_sizes[0]), check_trace=False)
+        traced = torch.jit.freeze(traced)
+    errors = check_parity(module, traced, args, batch_sizes)
+    worst = max(errors.values())
+    if worst > tolerance:
+        raise ValueError(f'TorchScript模型与原模型输出不一致，最大误差{worst:.3g}超过{tolerance}: {errors}')
+    torch.jit.save(traced, path)
+    return errors
+
+
+def load_torchscript(path):
+    module = torch.jit.load(path, map_location='cpu')
+    module.eval()
+    return module
+
+
+# torch 1.8最高只能导出opset 13，对应onnx 1.8、onnxruntime 1.6及以上
+ONNX_OPSET = 13
+
+
+def export_onnx(model, args, path, check_batches=None, tolerance=1e-4, opset=ONNX_OPSET, sample_seed=0):
+    """
+    导出ONNX计算图，批大小为动态维度，seq_len、label_len、pred_len固定
+    ProbAttention改为固定的采样位置，采样索引作为常量写入计算图
+    :param check_batches: 用于一致性检查的批次列表，每项为((x_enc, x_mark_enc, x_dec, x_mark_dec), true)
+    :return: 与原模型(相同采样位置)输出的最大绝对误差
+    """
+    from models.attn import fix_sampling
+    from serving.validation import max_abs_error
+
+    fix_sampling(model, sample_seed)
+    module = inference_module(model, args).eval()
+    with torch.no_grad():
+        torch.onnx.export(module, example_inputs(args, 2), path,
+                          input_names=list(INPUT_NAMES), output_names=['prediction'],
+                          dynamic_axes={name: {0: 'batch'} for name in INPUT_NAMES + ('prediction',)},
+                          opset_version=opset)
+    if check_batches is None:
+        check_batches = [(example_inputs(args, batch_size), None) for batch_size in (1, 4)]
+    worst = max_abs_error(module, OnnxModule(path), check_batches)
+    if worst > tolerance:
+        os.remove(path)
+        raise ValueError(f'ONNX模型与原模型输出不一致，最大误差{worst:.3g}超过{tolerance}')
+    return worst
+
+
+class OnnxModule:
+    """以与PyTorch模型相同的方式调用ONNX Runtime会话，输入输出均为CPU张量"""
+    def __init__(self, path, threads=None):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError('onnx后端需要安装onnxruntime: pip install -r requirements-onnx.txt')
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads or torch.get_num_threads()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_names = [item.name for item in self.session.get_inputs()]
+        self.nbytes = os.path.getsize(path)
+
+    def __call__(self, *inputs):
+        feeds = {name: x.numpy() for name, x in zip(self.input_names, inputs)}
+        return torch.from_numpy(self.session.run(None, feeds)[0])
+
+    def eval(self):
+        return self
+
+
+def load_artifact(backend, path):
+    """加载导出的模型，返回可按(x_enc, x_mark_enc, x_dec, x_mark_dec)调用的对象"""
+    if backend == 'torchscript':
+        return load_torchscript(path)
+    if backend == 'onnx':
+        return OnnxModule(path)
+    raise ValueError(f'不支持的推理后端: {backend}')
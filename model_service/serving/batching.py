@@ -0,0 +1,109 @@
+# model_service/serving/batching.py
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+
+
+class _KeyQueue:
+    def __init__(self):
+        self.items = []
+        self.cond = threading.Condition()
+        self.thread = None
+
+
+class BatchScheduler:
+    """
+    动态微批调度器
+    同一模型键的并发请求在时间窗口内(或达到最大批大小时)合并为一次前向计算，
+    每个调用方通过Future拿到自己对应的切片
+    """
+    def __init__(self, run_batch, window_ms=5.0, max_batch_size=16):
+        """
+        :param run_batch: 函数run_batch(context, items)，返回与items一一对应的结果列表
+        :param window_ms: 收集请求的时间窗口(毫秒)
+        :param max_batch_size: 单批最大请求数
+        """
+        self.run_batch = run_batch
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max(1, int(max_batch_size))
+        self._queues = {}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.batch_sizes = defaultdict(int)
+
+    def submit(self, key, context, item):
+        """
+        提交一个请求
+        :param key: 模型键，只有相同键的请求会被合并
+        :param context: 执行该批次所需的上下文(如已加载的模型)
+        :param item: 单个请求的输入
+        :return: Future，结果为该请求对应的输出
+        """
+        future = Future()
+        queue = self._get_queue(key)
+        with queue.cond:
+            queue.items.append((context, item, future))
+            queue.cond.notify()
+        return future
+
+    def _get_queue(self, key):
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = self._queues[key] = _KeyQueue()
+                queue.thread = threading.Thread(target=self._dispatch_loop, args=(queue,),
+                                                name=f'batcher-{key}', daemon=True)
+                queue.thread.start()
+            return queue
+
+    def _dispatch_loop(self, queue):
+        while True:
+            with queue.cond:
+                while not queue.items:
+                    queue.cond.wait()
+                # 第一个请求到达后最多再等待一个时间窗口
+                deadline = time.monotonic() + self.window
+                while len(queue.items) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    queue.cond.wait(remaining)
+                batch = queue.items[:self.max_batch_size]
+                del queue.items[:self.max_batch_size]
+            self._run(batch)
+
+    def _run(self, batch):
+        with self._stats_lock:
+            self.batches += 1
+            self.requests += len(batch)
+            self.batch_sizes[len(batch)] += 1
+        context = batch[0][0]
+        try:
+            results = self.run_batch(context, [item for _, item, _ in batch])
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def queue_depth(self):
+        """当前排队等待合批的请求数"""
+        with self._lock:
+            queues = list(self._queues.values())
+        return sum(len(q.items) for q in queues)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'window_ms': self.window * 1000.0,
+                'max_batch_size': self.max_batch_size,
+                'queue_depth': self.queue_depth(),
+                'batches': self.batches,
+                'requests': self.requests,
+                'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+                'batch_sizes': dict(sorted(self.batch_sizes.items()))
+            }
@@ -0,0 +1,73 @@
+# model_service/serving/calendar.py
+"""
+推理时的日历时间标记
+与训练时timeenc=0的time_features布局一致：[month, day, weekday, hour(, minute)]，
+即TemporalEmbedding读取的整数列。按天预先计算月、日、星期的查找表，
+请求时只做整数运算和NumPy索引，不经过pandas
+"""
+import numpy as np
+
+# 各频率的列数及相邻时间步的间隔(分钟)
+FREQ_COLUMNS = {'h': 4, 't': 5}
+FREQ_STEP_MINUTES = {'h': 60, 't': 15}
+
+
+class CalendarEncoder:
+    def __init__(self, freq='h', start='1900-01-01', end='2200-01-01'):
+        """
+        :param freq: 数据频率，h为逐小时，t为15分钟
+        :param start: 查找表覆盖的第一天
+        :param end: 查找表覆盖的最后一天(不含)
+        """
+        if freq not in FREQ_COLUMNS:
+            raise ValueError(f'日历时间标记不支持频率{freq}，可选: {", ".join(FREQ_COLUMNS)}')
+        self.freq = freq
+        self.columns = FREQ_COLUMNS[freq]
+        self.step = FREQ_STEP_MINUTES[freq]
+        days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D'))
+        months = days.astype('datetime64[M]')
+        # 每天的[month, day, weekday]，weekday与datetime.weekday()一致，周一为0
+        self.day_table = np.stack([
+            months.astype(np.int64) % 12 + 1,
+            (days - months.astype('datetime64[D]')).astype(np.int64) + 1,
+            (days.astype(np.int64) + 3) % 7  # 1970-01-01是周四
+        ], axis=1).astype(np.int16)
+        self.origin = np.datetime64(start, 'm')
+
+    def to_minutes(self, times):
+        """
+        :param times: 时间戳或时间戳列表，支持字符串、datetime和numpy.datetime64
+        :return: 相对查找表起点的分钟数，int64数组
+        """
+        return (np.asarray(times, dtype='datetime64[m]') - self.origin).astype(np.int64)
+
+    def marks(self, starts, length):
+        """
+        生成从各起始时刻开始、长度为length的时间标记
+        :param starts: 形状为(B,)的起始时刻
+        :param length: 时间步数
+        :return: 形状为(B, length, columns)的float32数组
+        """
+        minutes = self.to_minutes(starts).reshape(-1, 1) + np.arange(length, dtype=np.int64) * self.step
+        day_index = minutes // 1440
+        if day_index.min() < 0 or day_index.max() >= len(self.day_table):
+            raise ValueError('时间戳超出日历查找表的范围')
+        out = np.empty(minutes.shape + (self.columns,), dtype=np.float32)
+        out[..., :3] = self.day_table[day_index]
+        out[..., 3] = (minutes // 60) % 24
+        if self.columns > 4:
+            out[..., 4] = (minutes % 60) // 15
+        return out
+
+    def window_marks(self, end_times, seq_len, label_len, pred_len):
+        """
+        编码器和解码器的时间标记
+        :param end_times: 形状为(B,)的输入窗口最后一个时间步的时刻
+        :return: (x_mark_enc (B, seq_len, columns), x_mark_dec (B, label_len + pred_len, columns))
+        """
+        ends = np.asarray(end_times, dtype='datetime64[m]').reshape(-1)
+        step = np.timedelta64(self.step, 'm')
+        # 解码器从输入窗口最后label_len步开始，延伸到预测的最后一步
+        enc = self.marks(ends - (seq_len - 1) * step, seq_len)
+        dec = self.marks(ends - (label_len - 1) * step, label_len + pred_len)
+        return enc, dec
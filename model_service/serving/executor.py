@@ -0,0 +1,53 @@
+# model_service/serving/executor.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class InferenceQueueFull(Exception):
+    """推理队列已满，调用方应快速失败而不是继续排队"""
+    pass
+
+
+class InferenceExecutor:
+    """
+    有界推理执行器
+    前向计算在固定数量的推理线程中执行，排队中的任务数超过上限时直接拒绝，
+    避免慢请求占满所有请求线程
+    """
+    def __init__(self, max_workers=1, max_queue=64):
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='inference')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rejected = 0
+        self.completed = 0
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise InferenceQueueFull(f'推理队列已满（{self._pending}个任务进行中或排队中）')
+            self._pending += 1
+        future = self._pool.submit(fn, *args, **kwargs)
+        future.add_done_callback(self._done)
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """提交任务并等待结果"""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def _done(self, _):
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'pending': self._pending,
+                'completed': self.completed,
+                'rejected': self.rejected
+            }
@@ -0,0 +1,74 @@
+# model_service/serving/horizon.py
+"""
+预测长度路由
+一个按最长预测长度训练的模型可以服务所有更短的预测长度，只需截取输出的前pred_len步，
+这样每个数据集只需常驻一个模型，而不是每个预测长度各一个
+路由表为JSON列表，可以直接写在HORIZON_ROUTES环境变量中，也可以是JSON文件路径：
+[{"data_name": "QianTangRiver2020-2024WorkedFull", "pred_len": 168, "weights": "informer_mtest_0", "horizons": [1, 168]}]
+- pred_len: 路由到的模型训练时的预测长度，决定加载哪个setting对应的权重
+- weights: 只对该权重名称生效，省略时对所有权重名称生效
+- horizons: 可服务的预测长度范围[最小, 最大]，省略时为[1, pred_len]
+"""
+import json
+import os
+
+
+class HorizonRoute:
+    def __init__(self, data_name, pred_len, weights=None, horizons=None):
+        self.data_name = data_name
+        self.pred_len = int(pred_len)
+        self.weights = weights
+        low, high = horizons if horizons else (1, self.pred_len)
+        self.min_horizon, self.max_horizon = int(low), int(high)
+        if not 1 <= self.min_horizon <= self.max_horizon <= self.pred_len:
+            raise ValueError(f'{data_name}的路由范围[{low}, {high}]必须在[1, {self.pred_len}]之内')
+
+    def covers(self, data_name, pred_len, weights_name):
+        return (self.data_name == data_name
+                and (self.weights is None or self.weights == weights_name)
+                and self.min_horizon <= pred_len <= self.max_horizon)
+
+    def to_dict(self):
+        return {
+            'data_name': self.data_name,
+            'pred_len': self.pred_len,
+            'weights': self.weights,
+            'horizons': [self.min_horizon, self.max_horizon]
+        }
+
+
+class HorizonRouter:
+    """根据路由表把(data_name, pred_len, weights_name)映射为实际加载的模型键"""
+    def __init__(self, routes=()):
+        self.routes = list(routes)
+
+    @classmethod
+    def from_spec(cls, spec):
+        """
+        :param spec: JSON字符串或JSON文件路径，为空时不启用路由
+        """
+        if not spec:
+            return cls()
+        if os.path.isfile(spec):
+            with open(spec, encoding='utf-8') as f:
+                items = json.load(f)
+        else:
+            items = json.loads(spec)
+        return cls(HorizonRoute(item['data_name'], item['pred_len'], item.get('weights'), item.get('horizons'))
+                   for item in items)
+
+    def route(self, data_name, pred_len, weights_name):
+        """
+        :return: 实际加载的模型键(data_name, 模型预测长度, weights_name)，没有覆盖该预测长度的路由时原样返回
+        """
+        # 多条路由都覆盖时选择预测长度最短的模型，解码器计算量最小
+        best = None
+        for route in self.routes:
+            if route.covers(data_name, pred_len, weights_name) and (best is None or route.pred_len < best.pred_len):
+                best = route
+        if best is None:
+            return data_name, pred_len, weights_name
+        return data_name, best.pred_len, weights_name
+
+    def table(self):
+        return [route.to_dict() for route in self.routes]
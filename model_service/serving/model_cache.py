@@ -0,0 +1,143 @@
+# model_service/serving/model_cache.py
+import threading
+from collections import OrderedDict
+
+
+def module_nbytes(module):
+    """估算模型参数和缓冲区占用的字节数，ONNX、int8量化等模型使用其nbytes属性"""
+    if getattr(module, 'nbytes', None) is not None or not hasattr(module, 'parameters'):
+        return getattr(module, 'nbytes', 0)
+    total = 0
+    for tensor in list(module.parameters()) + list(module.buffers()):
+        total += tensor.numel() * tensor.element_size()
+    return total
+
+
+class LoadedModel:
+    """已加载权重并处于eval模式、可直接推理的模型"""
+    def __init__(self, model, args, setting, weights_path, backend='eager', artifact_path=None):
+        """
+        :param backend: 推理后端，torchscript、onnx时model为从artifact_path加载的导出模型，
+                        int8时model为量化后的模型，artifact_path为量化验证报告
+        """
+        self.model = model
+        self.args = args
+        self.setting = setting
+        self.weights_path = weights_path
+        self.backend = backend
+        self.artifact_path = artifact_path
+        self.nbytes = module_nbytes(model)
+
+    @property
+    def returns_attention(self):
+        """模型输出是否为(预测, 注意力)；导出和量化的模型已由TensorOutput只返回预测结果"""
+        return bool(self.args.output_attention) and self.backend == 'eager'
+
+
+class ModelCache:
+    """
+    以(data_name, pred_len, weights_name)为键的模型缓存
+    超出内存预算(或条目上限)时按LRU顺序淘汰，最近一次加载的模型始终保留
+    """
+    def __init__(self, max_bytes, max_entries=None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+        self._listeners = []
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def add_listener(self, callback):
+        """注册移除回调，参数为被淘汰或失效的LoadedModel列表"""
+        self._listeners.append(callback)
+
+    def _notify(self, removed):
+        if removed:
+            for callback in self._listeners:
+                callback(removed)
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def get(self, key, loader):
+        """
+        获取缓存的模型，未命中时调用loader加载
+        :param key: 缓存键
+        :param loader: 无参函数，返回LoadedModel
+        :return: LoadedModel
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        # 同一个键只加载一次，其他键的请求不受影响
+        with key_lock:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    return entry
+                self.misses += 1
+            try:
+                entry = loader()
+                with self._lock:
+                    self._entries[key] = entry
+                    self.total_bytes += entry.nbytes
+                    removed = self._evict()
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        self._notify(removed)
+        return entry
+
+    def _evict(self):
+        removed = []
+        while len(self._entries) > 1 and (
+                self.total_bytes > self.max_bytes or
+                (self.max_entries is not None and len(self._entries) > self.max_entries)):
+            _, entry = self._entries.popitem(last=False)
+            self.total_bytes -= entry.nbytes
+            self.evictions += 1
+            removed.append(entry)
+        return removed
+
+    def invalidate(self, predicate=None):
+        """
+        移除满足条件的缓存条目
+        :param predicate: 接收(key, entry)的函数，为None时清空缓存
+        :return: 移除的条目数
+        """
+        with self._lock:
+            keys = [k for k, v in self._entries.items() if predicate is None or predicate(k, v)]
+            removed = [self._entries.pop(k) for k in keys]
+            for entry in removed:
+                self.total_bytes -= entry.nbytes
+        self._notify(removed)
+        return len(keys)
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries.keys())
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
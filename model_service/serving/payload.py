@@ -0,0 +1,149 @@
+# model_service/serving/payload.py
+"""
+预测请求体解析
+除JSON外支持两种二进制格式，均通过np.frombuffer零拷贝解码：
+- application/x-npy: .npy字节流
+- application/octet-stream: 小端float32原始数据，形状由X-Tensor-Shape请求头给出，如"1000,5"
+二进制请求的其他参数(prediction_hours、data_name、weights、timestamp等)通过查询字符串传递
+"""
+import ast
+
+import numpy as np
+
+NPY_CONTENT_TYPE = 'application/x-npy'
+RAW_CONTENT_TYPE = 'application/octet-stream'
+SHAPE_HEADER = 'X-Tensor-Shape'
+
+
+class PayloadError(Exception):
+    """请求体格式错误"""
+    pass
+
+
+def is_binary(request):
+    return request.mimetype in (NPY_CONTENT_TYPE, RAW_CONTENT_TYPE)
+
+
+def decode_npy(buffer):
+    """
+    解析.npy字节流，数据部分直接引用请求体内存
+    :param buffer: bytes
+    :return: numpy数组
+    """
+    prefix = np.lib.format.MAGIC_PREFIX
+    if len(buffer) < len(prefix) + 4 or buffer[:len(prefix)] != prefix:
+        raise PayloadError('不是有效的.npy数据')
+    major = buffer[len(prefix)]
+    if major == 1:
+        header_len = int.from_bytes(buffer[8:10], 'little')
+        offset = 10
+    elif major in (2, 3):
+        header_len = int.from_bytes(buffer[8:12], 'little')
+        offset = 12
+    else:
+        raise PayloadError(f'不支持的.npy版本: {major}')
+    try:
+        header = ast.literal_eval(buffer[offset:offset + header_len].decode('latin1'))
+        dtype = np.dtype(header['descr'])
+        shape = tuple(header['shape'])
+        fortran_order = header['fortran_order']
+    except Exception:
+        raise PayloadError('.npy头部格式错误')
+    if dtype.hasobject:
+        raise PayloadError('不支持object类型的.npy数据')
+    count = int(np.prod(shape)) if shape else 1
+    data_offset = offset + header_len
+    if len(buffer) - data_offset < count * dtype.itemsize:
+        raise PayloadError('.npy数据长度与形状不符')
+    array = np.frombuffer(buffer, dtype=dtype, count=count, offset=data_offset)
+    return array.reshape(shape, order='F' if fortran_order else 'C')
+
+
+def decode_raw(buffer, shape_header):
+    """
+    解析小端float32原始数据
+    :param buffer: bytes
+    :param shape_header: 形状字符串，如"1000,5"
+    """
+    if not shape_header:
+        raise PayloadError(f'缺少{SHAPE_HEADER}请求头')
+    try:
+        shape = tuple(int(dim) for dim in shape_header.split(','))
+    except ValueError:
+        raise PayloadError(f'{SHAPE_HEADER}格式错误: {shape_header}')
+    count = int(np.prod(shape))
+    if len(buffer) != count * 4:
+        raise PayloadError(f'数据长度为{len(buffer)}字节，与形状{shape}不符')
+    return np.frombuffer(buffer, dtype='<f4', count=count).reshape(shape)
+
+
+def decode_binary(request):
+    """
+    解析二进制请求体
+    :return: float32数组，dtype已是float32时不复制
+    """
+    buffer = request.get_data(cache=False)
+    if request.mimetype == NPY_CONTENT_TYPE:
+        array = decode_npy(buffer)
+    else:
+        array = decode_raw(buffer, request.headers.get(SHAPE_HEADER))
+    if array.dtype.kind not in 'biuf':
+        raise PayloadError(f'不支持{array.dtype}类型的数据')
+    return array.astype(np.float32, copy=False)
+
+
+def binary_params(request):
+    """二进制请求的参数来自查询字符串，与JSON请求体中的字段同名"""
+    params = {}
+    for name in ('prediction_hours', 'model_type', 'data_name', 'weights', 'timestamp'):
+        if name in request.args:
+            params[name] = request.args[name]
+    if 'prediction_hours' in params:
+        hours = [parse_pred_len(h) for h in params['prediction_hours'].split(',')]
+        params['prediction_hours'] = hours[0] if len(hours) == 1 else hours
+    return params
+
+
+def parse_json(request):
+    """
+    解析JSON请求体
+    :return: dict，请求体不是合法的JSON对象时抛出PayloadError
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        raise PayloadError('请求体不是有效的JSON对象')
+    return data
+
+
+def parse_pred_len(value):
+    """
+    解析预测长度
+    :param value: 正整数或整数字符串，如24、"24"
+    :return: int
+    """
+    if isinstance(value, str):
+        try:
+            pred_len = int(value.strip())
+        except ValueError:
+            pred_len = None
+    elif isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+        pred_len = int(value)
+    else:
+        pred_len = None
+    if pred_len is None or pred_len < 1:
+        raise PayloadError(f'prediction_hours应为正整数，实际为{value!r}')
+    return pred_len
+
+
+def parse_timestamp(value):
+    """
+    解析观测时间
+    :param value: 时间字符串，如"2024-05-01 08:00:00"，为空时返回None
+    :return: 分钟精度的numpy.datetime64
+    """
+    if value is None or value == '':
+        return None
+    try:
+        return np.datetime64(value).astype('datetime64[m]')
+    except (ValueError, TypeError):
+        raise PayloadError(f'时间戳格式错误: {value}')
@@ -0,0 +1,210 @@
+# model_service/serving/process_pool.py
+"""
+多进程推理
+前向计算交给一组推理子进程执行，各自设置intra-op线程数，不再与Flask请求线程争用GIL。
+模型只在主进程加载一次，通过share_memory()放入共享内存后传给子进程，子进程之间不复制权重；
+请求分配给排队任务最少的子进程
+"""
+import itertools
+import os
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import torch
+import torch.multiprocessing as mp
+
+from serving.backends import EXPORT_BACKENDS
+from serving.request_log import logger
+
+
+def _worker_main(index, torch_threads, requests, responses):
+    """推理子进程：接收共享内存中的模型并执行前向计算，输入输出均为numpy数组"""
+    torch.set_num_threads(torch_threads)
+    models = {}
+    while True:
+        message = requests.get()
+        kind = message[0]
+        if kind == 'stop':
+            return
+        if kind == 'load':
+            _, token, module, output_attention = message
+            module.eval()
+            models[token] = (module, output_attention)
+        elif kind == 'load_artifact':
+            # 导出的模型不能通过队列传递，由子进程从文件加载
+            _, token, backend, path = message
+            from serving.backends import load_artifact
+            models[token] = (load_artifact(backend, path), False)
+        elif kind == 'drop':
+            models.pop(message[1], None)
+        elif kind == 'run':
+            _, request_id, token, inputs = message
+            try:
+                module, output_attention = models[token]
+                with torch.no_grad():
+                    outputs = module(*(torch.from_numpy(x) for x in inputs))
+                if output_attention:
+                    outputs = outputs[0]
+                responses.put((request_id, outputs.numpy(), None))
+            except Exception as e:
+                responses.put((request_id, None, f'推理进程{index}执行失败: {type(e).__name__}: {e}'))
+
+
+class _Worker:
+    def __init__(self, index, process, requests):
+        self.index = index
+        self.process = process
+        self.requests = requests
+        self.pending = 0
+        # 已发送给该进程的模型，值为LoadedModel，保持引用以免id被复用
+        self.models = OrderedDict()
+
+
+class ProcessInferencePool:
+    def __init__(self, processes, torch_threads=None, max_models=8, timeout=120.0, check_interval=1.0):
+        """
+        :param processes: 推理子进程数
+        :param torch_threads: 每个子进程的intra-op线程数，默认平分CPU核数
+        :param max_models: 每个子进程最多保留的模型数，超出时按LRU顺序释放
+        :param timeout: 等待一次前向结果的最长时间(秒)
+        :param check_interval: 检查子进程存活的间隔(秒)，与请求量无关
+        """
+        self.processes = max(1, int(processes))
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // self.processes)
+        self.max_models = max(1, int(max_models))
+        self.timeout = timeout
+        self.check_interval = check_interval
+        # 子进程用spawn启动，避免fork时复制主进程中的线程和OpenMP状态
+        self._ctx = mp.get_context('spawn')
+        self._responses = self._ctx.Queue()
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._ids = itertools.count()
+        self._closed = False
+        self.completed = 0
+        self.restarts = 0
+        self.timeouts = 0
+        self._stop = threading.Event()
+        self._workers = [self._start_worker(i) for i in range(self.processes)]
+        self._reader = threading.Thread(target=self._read_responses, name='inference-pool-reader', daemon=True)
+        self._reader.start()
+        # 存活检查使用独立线程，持续有响应时也能及时发现退出的子进程
+        self._monitor = threading.Thread(target=self._monitor_workers, name='inference-pool-monitor', daemon=True)
+        self._monitor.start()
+
+    def _start_worker(self, index):
+        requests = self._ctx.Queue()
+        process = self._ctx.Process(target=_worker_main, args=(index, self.torch_threads, requests, self._responses),
+                                    name=f'inference-{index}', daemon=True)
+        process.start()
+        return _Worker(index, process, requests)
+
+    def run(self, entry, *inputs):
+        """
+        在子进程中执行entry.model(*inputs)
+        :param entry: LoadedModel
+        :param inputs: CPU张量
+        :return: 模型输出张量
+        """
+        future = Future()
+        arrays = [x.numpy() for x in inputs]
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('推理进程池已关闭')
+            worker = min(self._workers, key=lambda w: w.pending)
+            token = id(entry)
+            if token in worker.models:
+                worker.models.move_to_end(token)
+            else:
+                if entry.backend in EXPORT_BACKENDS:
+                    worker.requests.put(('load_artifact', token, entry.backend, entry.artifact_path))
+                else:
+                    # 参数移入共享内存后只传递句柄，子进程直接引用同一份权重；
+                    # int8模型的打包权重不在共享内存中，每个子进程各保留一份
+                    entry.model.share_memory()
+                    worker.requests.put(('load', token, entry.model, entry.returns_attention))
+                worker.models[token] = entry
+                while len(worker.models) > self.max_models:
+                    old, _ = worker.models.popitem(last=False)
+                    worker.requests.put(('drop', old))
+            request_id = next(self._ids)
+            self._futures[request_id] = (future, worker)
+            worker.pending += 1
+            worker.requests.put(('run', request_id, token, arrays))
+        try:
+            return torch.from_numpy(future.result(timeout=self.timeout))
+        except FutureTimeoutError:
+            with self._lock:
+                if self._futures.pop(request_id, None) is not None:
+                    worker.pending -= 1
+                    self.timeouts += 1
+            raise TimeoutError(f'推理进程{worker.index}在{self.timeout}秒内没有返回结果')
+
+    def release(self, entry):
+        """模型已从主进程缓存中移除，让持有它的子进程释放"""
+        token = id(entry)
+        with self._lock:
+            for worker in self._workers:
+                if worker.models.pop(token, None) is not None:
+                    worker.requests.put(('drop', token))
+
+    def _read_responses(self):
+        while not self._closed:
+            try:
+                request_id, output, error = self._responses.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            with self._lock:
+                future, worker = self._futures.pop(request_id, (None, None))
+                if worker is not None:
+                    worker.pending -= 1
+                    self.completed += 1
+            if future is None:
+                continue
+            if error is not None:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(output)
+
+    def _monitor_workers(self):
+        while not self._stop.wait(self.check_interval):
+            self._check_workers()
+
+    def _check_workers(self):
+        """子进程异常退出时让其上的请求失败并重新启动"""
+        with self._lock:
+            for i, worker in enumerate(self._workers):
+                if self._closed or worker.process.is_alive():
+                    continue
+                logger.error(f"推理进程{worker.index}异常退出(exitcode={worker.process.exitcode})，正在重启")
+                failed = [rid for rid, (_, w) in self._futures.items() if w is worker]
+                for request_id in failed:
+                    future, _ = self._futures.pop(request_id)
+                    future.set_exception(RuntimeError(f'推理进程{worker.index}异常退出'))
+                self._workers[i] = self._start_worker(worker.index)
+                self.restarts += 1
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            self._closed = True
+            for worker in self._workers:
+                worker.requests.put(('stop',))
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'processes': self.processes,
+                'torch_threads': self.torch_threads,
+                'completed': self.completed,
+                'restarts': self.restarts,
+                'timeouts': self.timeouts,
+                'workers': [{'pending': w.pending, 'models': len(w.models), 'alive': w.process.is_alive()}
+                            for w in self._workers]
+            }
@@ -0,0 +1,125 @@
+# model_service/serving/quantization.py
+"""
+动态int8量化
+nn.Linear和LocalRNN中的nn.LSTM直接使用quantize_dynamic；编码器、解码器中d_ff的1x1卷积等价于逐时间步的线性层，
+先替换为PointwiseLinear再一起量化。TokenEmbedding的k=3卷积没有动态量化实现，保持浮点。
+量化前需要用export_model.py --backend int8在测试集上比较浮点模型和量化模型的utils.metrics.metric，
+结果保存在权重文件旁的<权重文件名>.int8.json中，服务只在MAE、RMSE的相对变化不超过容差时启用量化
+"""
+import copy
+import io
+import json
+import os
+import time
+
+import torch
+import torch.nn as nn
+
+from serving.backends import artifact_path, inference_module
+
+
+class PointwiseLinear(nn.Module):
+    """与kernel_size=1的Conv1d等价的线性层，输入输出均为[B, C, L]"""
+    def __init__(self, conv):
+        super(PointwiseLinear, self).__init__()
+        self.linear = nn.Linear(conv.in_channels, conv.out_channels, bias=conv.bias is not None)
+        with torch.no_grad():
+            self.linear.weight.copy_(conv.weight.squeeze(-1))
+            if conv.bias is not None:
+                self.linear.bias.copy_(conv.bias)
+
+    def forward(self, x):
+        return self.linear(x.transpose(1, 2)).transpose(1, 2)
+
+
+def pointwise_to_linear(model):
+    """将模型中kernel_size=1、无分组的Conv1d替换为PointwiseLinear"""
+    for name, child in list(model.named_children()):
+        if (isinstance(child, nn.Conv1d) and child.kernel_size == (1,) and child.stride == (1,)
+                and child.padding == (0,) and child.dilation == (1,) and child.groups == 1):
+            setattr(model, name, PointwiseLinear(child))
+        else:
+            pointwise_to_linear(child)
+    return model
+
+
+def quantize_model(model, args):
+    """
+    :param model: eval模式的浮点模型，不会被修改
+    :param args: 模型参数，output_attention为True时只保留预测结果
+    :return: 动态int8量化后的模型副本，输出为预测张量
+    """
+    module = pointwise_to_linear(copy.deepcopy(inference_module(model, args))).eval()
+    # torch 1.10起量化接口位于torch.ao.quantization，1.8只有torch.quantization
+    quantization = getattr(torch, 'ao', torch).quantization
+    quantized = quantization.quantize_dynamic(module, {nn.Linear, nn.LSTM}, dtype=torch.qint8)
+    # 量化后的权重打包保存，不在parameters()中，按序列化后的大小计入模型缓存
+    buffer = io.BytesIO()
+    torch.save(quantized.state_dict(), buffer)
+    quantized.nbytes = buffer.tell()
+    return quantized
+
+
+def report_path(weights_path):
+    return artifact_path(weights_path, 'int8')
+
+
+def evaluate(module, batches):
+    """在测试集批次上计算utils.metrics.metric"""
+    from utils.metrics import metric
+    from serving.validation import predict
+
+    preds, trues = predict(module, batches)
+    mae, mse, rmse = metric(preds, trues)[:3]
+    return {'mae': float(mae), 'mse': float(mse), 'rmse': float(rmse)}
+
+
+def validate(model, args, weights_path, limit=None, batch_size=32):
+    """
+    比较浮点模型和量化模型在测试集上的指标，并把结果写入报告文件
+    ProbAttention在两次评估前使用相同的随机种子，采样位置一致
+    :return: 报告字典
+    """
+    from serving.validation import test_batches
+
+    batches = list(test_batches(args, limit, batch_size))
+    reference = inference_module(model, args).eval()
+    candidate = quantize_model(model, args)
+    torch.manual_seed(0)
+    float_metrics = evaluate(reference, batches)
+    torch.manual_seed(0)
+    int8_metrics = evaluate(candidate, batches)
+    report = {
+        'weights': weights_path,
+        'windows': sum(len(true) for _, true in batches),
+        'float': float_metrics,
+        'int8': int8_metrics,
+        'degradation': {name: relative_change(float_metrics[name], int8_metrics[name]) for name in ('mae', 'rmse')},
+        'created': time.time()
+    }
+    with open(report_path(weights_path), 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+def relative_change(reference, value):
+    return (value - reference) / reference if reference else 0.0
+
+
+def check_report(weights_path, tolerance):
+    """
+    检查量化验证报告
+    :param tolerance: MAE、RMSE允许的最大相对变化，如0.02表示2%
+    :return: (是否允许量化, 原因)
+    """
+    path = report_path(weights_path)
+    if not os.path.isfile(path):
+        return False, f'没有量化验证报告{path}，请先运行export_model.py --backend int8'
+    if os.path.getmtime(path) < os.path.getmtime(weights_path):
+        return False, f'量化验证报告{path}早于权重文件，请重新验证'
+    with open(path, encoding='utf-8') as f:
+        report = json.load(f)
+    worse = {name: change for name, change in report['degradation'].items() if change > tolerance}
+    if worse:
+        return False, f'量化后指标下降超过容差{tolerance}: {worse}'
+    return True, None
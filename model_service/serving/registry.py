@@ -0,0 +1,196 @@
+# model_service/serving/registry.py
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+
+logger = logging.getLogger('model_service')
+
+# 与main_informer.py中setting字符串的格式保持一致
+SETTING_PATTERN = re.compile(
+    r'^(?P<model>[a-z]+)_(?P<data>.+)_ft(?P<features>[A-Z]+)_sl(?P<seq_len>\d+)_ll(?P<label_len>\d+)'
+    r'_pl(?P<pred_len>\d+)_dm(?P<d_model>\d+)_nh(?P<n_heads>\d+)_el(?P<e_layers>\d+)_dl(?P<d_layers>\d+)'
+    r'_df(?P<d_ff>\d+)_at(?P<attn>[a-z_]+)_fc(?P<factor>\d+)_eb(?P<embed>[a-zA-Z]+)'
+    r'_dt(?P<distil>True|False)_mx(?P<mix>True|False)_(?P<des>.+)_(?P<ii>\d+)$')
+
+INT_FIELDS = ('seq_len', 'label_len', 'pred_len', 'd_model', 'n_heads', 'e_layers', 'd_layers', 'd_ff', 'factor', 'ii')
+BOOL_FIELDS = ('distil', 'mix')
+# 决定模型结构和参数形状的字段，服务按权重所在setting构建模型，蒸馏得到的小模型也能直接加载
+ARCHITECTURE_FIELDS = ('d_model', 'n_heads', 'e_layers', 'd_layers', 'd_ff', 'attn', 'factor', 'distil', 'mix')
+
+
+def parse_setting(setting):
+    """
+    解析setting字符串
+    :return: 参数字典，格式不匹配时返回None
+    """
+    match = SETTING_PATTERN.match(setting)
+    if match is None:
+        return None
+    params = match.groupdict()
+    for field in INT_FIELDS:
+        params[field] = int(params[field])
+    for field in BOOL_FIELDS:
+        params[field] = params[field] == 'True'
+    return params
+
+
+class CheckpointEntry:
+    """一个可加载的权重文件"""
+    def __init__(self, name, path, setting, mtime, size):
+        self.name = name
+        self.path = path
+        self.setting = setting
+        self.mtime = mtime
+        self.size = size
+        self.params = parse_setting(setting) if setting else None
+
+    @property
+    def dataset(self):
+        return self.params['data'] if self.params else None
+
+    @property
+    def pred_len(self):
+        return self.params['pred_len'] if self.params else None
+
+    @property
+    def architecture(self):
+        """setting中的模型结构参数，setting无法解析时为空字典"""
+        return {field: self.params[field] for field in ARCHITECTURE_FIELDS} if self.params else {}
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'path': self.path,
+            'setting': self.setting,
+            'dataset': self.dataset,
+            'pred_len': self.pred_len,
+            'size': self.size,
+            'mtime': datetime.fromtimestamp(self.mtime).isoformat()
+        }
+
+
+def _pick_default(files):
+    # 目录下有多个.pth时优先使用训练保存的checkpoint.pth，否则按文件名排序取第一个
+    names = sorted(files)
+    return 'checkpoint.pth' if 'checkpoint.pth' in names else names[0]
+
+
+class CheckpointRegistry:
+    """
+    启动时扫描一次checkpoints目录并建立索引，之后由后台线程定期检查文件变化并刷新，
+    请求路径上不再有文件系统操作
+    支持三种布局：checkpoints/<名称>/*.pth、checkpoints/<setting>/<名称>.pth、checkpoints/<名称>.pth
+    """
+    def __init__(self, root, refresh_seconds=30.0):
+        self.root = root
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._stop = threading.Event()
+        self._signature = None
+        self._dirs = {}
+        self._files = {}
+        self._root_files = {}
+        self.refresh()
+        if refresh_seconds and refresh_seconds > 0:
+            thread = threading.Thread(target=self._watch, name='checkpoint-registry', daemon=True)
+            thread.start()
+
+    def add_listener(self, callback):
+        """注册变更回调，参数为发生变化或被删除的权重文件路径集合"""
+        self._listeners.append(callback)
+
+    def _scan(self):
+        dirs, files, root_files, signature = {}, {}, {}, []
+        if not os.path.isdir(self.root):
+            return dirs, files, root_files, tuple(signature)
+        for item in sorted(os.scandir(self.root), key=lambda e: e.name):
+            if item.is_file() and item.name.endswith('.pth'):
+                stat = item.stat()
+                stem = item.name[:-len('.pth')]
+                root_files[stem] = CheckpointEntry(stem, item.path, stem if parse_setting(stem) else None,
+                                                   stat.st_mtime, stat.st_size)
+                signature.append((item.name, stat.st_mtime_ns, stat.st_size))
+            elif item.is_dir():
+                pth = {}
+                for sub in os.scandir(item.path):
+                    if sub.is_file() and sub.name.endswith('.pth'):
+                        stat = sub.stat()
+                        pth[sub.name] = CheckpointEntry(item.name, sub.path, item.name, stat.st_mtime, stat.st_size)
+                        signature.append((item.name, sub.name, stat.st_mtime_ns, stat.st_size))
+                if not pth:
+                    continue
+                dirs[item.name] = pth[_pick_default(pth)]
+                for file_name, entry in pth.items():
+                    files[(item.name, file_name[:-len('.pth')])] = entry
+        return dirs, files, root_files, tuple(sorted(signature))
+
+    def refresh(self):
+        """
+        重新扫描目录，有变化时更新索引并通知监听者
+        :return: 是否发生变化
+        """
+        dirs, files, root_files, signature = self._scan()
+        with self._lock:
+            if signature == self._signature:
+                return False
+            old = {e.path: (e.mtime, e.size) for e in self._all_entries()}
+            old_dirs = self._dirs
+            self._dirs, self._files, self._root_files = dirs, files, root_files
+            self._signature = signature
+            new = {e.path: (e.mtime, e.size) for e in self._all_entries()}
+        changed = {path for path, stat in old.items() if new.get(path) != stat}
+        # 目录的默认权重文件发生切换时，旧文件对应的模型也需要失效
+        changed.update(e.path for name, e in old_dirs.items()
+                       if name not in dirs or dirs[name].path != e.path)
+        if changed:
+            logger.info(f"检测到权重文件变化: {sorted(changed)}")
+            for callback in self._listeners:
+                callback(changed)
+        return True
+
+    def close(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.refresh_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"刷新权重索引失败: {e}")
+
+    def _all_entries(self):
+        return list(self._dirs.values()) + list(self._files.values()) + list(self._root_files.values())
+
+    def resolve(self, weights_name, setting=None):
+        """
+        查找权重文件，查找顺序与原先的目录扫描逻辑一致
+        :param weights_name: 权重名称
+        :param setting: 当前模型参数对应的setting字符串
+        :return: CheckpointEntry
+        """
+        with self._lock:
+            entry = self._dirs.get(weights_name)
+            if entry is None and setting is not None:
+                entry = self._files.get((setting, weights_name))
+            if entry is None:
+                entry = self._root_files.get(weights_name)
+        if entry is None:
+            tried = [os.path.join(self.root, weights_name)]
+            if setting is not None:
+                tried.append(os.path.join(self.root, setting, f'{weights_name}.pth'))
+            tried.append(os.path.join(self.root, f'{weights_name}.pth'))
+            raise Exception(f"模型文件不存在。已尝试路径: {', '.join(tried)}")
+        return entry
+
+    def entries(self):
+        """每个可用权重名称对应的默认权重文件"""
+        with self._lock:
+            listed = dict(self._root_files)
+            listed.update(self._dirs)
+        return [listed[name] for name in sorted(listed)]
+
+    def datasets(self):
+        return sorted({e.dataset for e in self.entries() if e.dataset})
@@ -0,0 +1,109 @@
+# model_service/serving/request_log.py
+"""
+请求日志
+每个请求只输出一条汇总记录，包含各阶段耗时(解析、模型查找、权重加载、张量准备、前向计算、序列化)，
+成功请求按采样率记录，失败请求总是记录
+"""
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger('model_service')
+
+_local = threading.local()
+_sample_rate = 1.0
+
+
+def configure_logging(level='INFO', sample_rate=1.0):
+    """
+    :param level: 日志级别，如DEBUG、INFO、WARNING
+    :param sample_rate: 成功请求汇总记录的采样率，取值0~1
+    """
+    global _sample_rate
+    _sample_rate = max(0.0, min(1.0, float(sample_rate)))
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+
+
+class RequestTimer:
+    """单个请求的分阶段耗时，嵌套阶段的耗时不重复计入外层阶段"""
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.fields = {}
+        self._stack = []
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        self._stack.append(0.0)
+        try:
+            yield
+        finally:
+            nested = self._stack.pop()
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed - nested
+            if self._stack:
+                self._stack[-1] += elapsed
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def summary(self, status):
+        record = {
+            'endpoint': self.endpoint,
+            'status': status,
+            'total_ms': round((time.perf_counter() - self.start) * 1000, 3)
+        }
+        record.update({f'{name}_ms': round(seconds * 1000, 3) for name, seconds in self.stages.items()})
+        record.update(self.fields)
+        return record
+
+
+class _NullTimer:
+    """请求线程之外(如合批线程)使用的空计时器"""
+    @contextmanager
+    def stage(self, name):
+        yield
+
+    def set(self, **fields):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+def start_request(endpoint):
+    _local.timer = RequestTimer(endpoint)
+    return _local.timer
+
+
+def current_timer():
+    return getattr(_local, 'timer', None) or NULL_TIMER
+
+
+def finish_request(status):
+    """
+    结束当前请求并输出汇总记录
+    :return: 当前请求的RequestTimer，没有进行中的请求时返回None
+    """
+    timer = getattr(_local, 'timer', None)
+    if timer is None:
+        return None
+    _local.timer = None
+    if status >= 500:
+        logger.error(json.dumps(timer.summary(status), ensure_ascii=False, default=str))
+    elif status >= 400:
+        logger.warning(json.dumps(timer.summary(status), ensure_ascii=False, default=str))
+    elif logger.isEnabledFor(logging.INFO) and random.random() < _sample_rate:
+        logger.info(json.dumps(timer.summary(status), ensure_ascii=False, default=str))
+    return timer
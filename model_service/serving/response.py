@@ -0,0 +1,64 @@
+# model_service/serving/response.py
+import json
+from datetime import datetime
+
+import numpy as np
+from flask import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FIELDS = ('date', 'temperature', 'pH', 'O2', 'NTU', 'uS')
+LAYOUTS = ('rows', 'columnar')
+
+
+def format_predictions(predictions, pred_len, layout='rows', start_time=None):
+    """
+    将模型输出格式化为逐小时的多参数预测结果，全部使用数组运算
+    时间戳与datetime.isoformat相同，整秒时不输出微秒；数值使用np.round保留两位小数，
+    np.round先乘以100再取整，恰好位于x.xx5附近的值与内置round的结果可能相差0.01
+    :param predictions: 形状为(pred_len, c_out)的预测结果
+    :param pred_len: 预测长度
+    :param layout: rows为每小时一个字典(默认)，columnar为每个字段一个数组
+    :param start_time: 第一个预测时刻，默认为当前时间
+    :return: 预测结果列表(rows)或字段到数组的字典(columnar)
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f'不支持的结果格式: {layout}，可选: {", ".join(LAYOUTS)}')
+    predictions = np.asarray(predictions)
+    if predictions.ndim == 1:
+        predictions = predictions[:, np.newaxis]
+    # 基于O2预测值生成其他参数的预测值（使用简化的关系模型）
+    o2 = predictions[:pred_len, 0].astype(np.float64)
+
+    # 生成时间戳，各时刻与起始时刻的秒以下部分相同，整秒时按秒输出
+    start = np.datetime64(start_time if start_time is not None else datetime.now(), 'us')
+    unit = 's' if start == start.astype('datetime64[s]') else 'us'
+    dates = np.datetime_as_string(start + np.arange(len(o2)) * np.timedelta64(1, 'h'), unit=unit)
+
+    # 基于经验关系生成其他参数的估计值，并确保数值在合理范围内
+    # 这些是示例关系，实际应用中应使用更精确的模型
+    delta = o2 - 8
+    columns = (
+        dates.tolist(),
+        np.round(np.clip(20 + delta * 0.5, 0, 35), 2).tolist(),  # 温度与溶解氧的简单反比关系
+        np.round(np.clip(7.5 + delta * 0.1, 6, 9), 2).tolist(),  # pH与溶解氧的简单关系
+        np.round(o2, 2).tolist(),
+        np.round(np.maximum(10 - delta * 0.5, 0), 2).tolist(),  # 浊度与溶解氧的简单反比关系
+        np.round(np.clip(500 + delta * 20, 50, 1500), 2).tolist()  # 电导率与溶解氧的简单正比关系
+    )
+
+    if layout == 'columnar':
+        return dict(zip(FIELDS, columns))
+    return [dict(zip(FIELDS, values)) for values in zip(*columns)]
+
+
+def json_response(payload, status=200):
+    """序列化JSON响应，安装了orjson时使用orjson"""
+    if orjson is not None:
+        body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    else:
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    return Response(body, status=status, mimetype='application/json')
@@ -0,0 +1,78 @@
+# model_service/serving/result_cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    预测结果缓存
+    键为(模型键, 实际使用的最后seq_len个时间步)的哈希，条目有过期时间，超出数量上限时按LRU顺序淘汰
+    """
+    def __init__(self, ttl_seconds=3600.0, max_entries=1024):
+        self.ttl = ttl_seconds
+        self.max_entries = max(1, int(max_entries))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    @staticmethod
+    def fingerprint(model_key, window):
+        """
+        计算输入窗口指纹
+        :param model_key: (data_name, pred_len, weights_name)
+        :param window: 形状为(seq_len, features)的float32数组
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr(model_key).encode('utf-8'))
+        digest.update(repr(window.shape).encode('ascii'))
+        digest.update(window.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[0] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value):
+        # 缓存的结果会被多个请求共享，复制一份并设为只读
+        value = value.copy()
+        value.setflags(write=False)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'expirations': self.expirations,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,66 @@
+# model_service/serving/validation.py
+"""
+在Dataset_Custom测试集上验证推理模型
+批次的组织方式与Exp_Informer._process_one_batch一致，用于导出模型的一致性检查和量化模型的精度检查
+"""
+import numpy as np
+import torch
+
+# 服务端时间标记的列数，与app.py中predict_batch一致
+MARK_COLUMNS = 4
+
+
+def test_batches(args, limit=None, batch_size=32):
+    """
+    按顺序读取测试集
+    :param args: 模型参数，需要root_path、data_path等数据参数
+    :param limit: 最多读取的窗口数，为None时读取全部测试集
+    :return: 生成器，每项为((x_enc, x_mark_enc, x_dec, x_mark_dec), true)，true为预测目标的真实值
+    """
+    from data.data_loader import Dataset_Custom
+
+    data_set = Dataset_Custom(
+        root_path=args.root_path,
+        data_path=args.data_path,
+        flag='test',
+        size=[args.seq_len, args.label_len, args.pred_len],
+        features=args.features,
+        target=args.target,
+        inverse=args.inverse,
+        timeenc=0 if args.embed != 'timeF' else 1,
+        freq=args.freq,
+        cols=args.cols
+    )
+    count = len(data_set) if limit is None else min(limit, len(data_set))
+    f_dim = -1 if args.features == 'MS' else 0
+    for start in range(0, count, batch_size):
+        items = [data_set[i] for i in range(start, min(start + batch_size, count))]
+        batch_x, batch_y, batch_x_mark, batch_y_mark = (
+            torch.from_numpy(np.stack(column)).float() for column in zip(*items))
+        dec_inp = torch.cat([batch_y[:, :args.label_len, :],
+                             torch.zeros(batch_y.shape[0], args.pred_len, batch_y.shape[-1])], dim=1)
+        # TemporalEmbedding只读取前4列，截取后与服务端的输入形状一致
+        inputs = (batch_x, batch_x_mark[..., :MARK_COLUMNS], dec_inp, batch_y_mark[..., :MARK_COLUMNS])
+        yield inputs, batch_y[:, -args.pred_len:, f_dim:]
+
+
+def predict(module, batches):
+    """
+    :param module: 可调用的模型，输入为(x_enc, x_mark_enc, x_dec, x_mark_dec)，输出为预测张量
+    :return: (preds, trues)，形状均为(N, pred_len, c_out)的numpy数组
+    """
+    preds, trues = [], []
+    with torch.no_grad():
+        for inputs, true in batches:
+            preds.append(module(*inputs).detach().cpu().numpy())
+            trues.append(true.numpy())
+    return np.concatenate(preds), np.concatenate(trues)
+
+
+def max_abs_error(reference, candidate, batches):
+    """两个模型在相同批次上输出的最大绝对误差"""
+    worst = 0.0
+    with torch.no_grad():
+        for inputs, _ in batches:
+            worst = max(worst, float((reference(*inputs) - candidate(*inputs)).abs().max()))
+    return worst
@@ -0,0 +1,82 @@
+# model_service/serving/warmup.py
+import threading
+import time
+
+
+def parse_warmup_models(spec):
+    """
+    解析需要预热的模型键
+    :param spec: 以分号分隔的"data_name:pred_len:weights_name"，如"QianTangRiver2020-2024WorkedFull:24:informer_mtest_0"
+    :return: [(data_name, pred_len, weights_name), ...]
+    """
+    keys = []
+    for item in (spec or '').split(';'):
+        item = item.strip()
+        if not item:
+            continue
+        parts = item.split(':')
+        if len(parts) != 3:
+            raise ValueError(f'预热模型格式应为data_name:pred_len:weights_name，实际为{item}')
+        keys.append((parts[0], int(parts[1]), parts[2]))
+    return keys
+
+
+def parse_batch_sizes(spec):
+    """:param spec: 逗号分隔的批大小，如"1,8,16" """
+    sizes = sorted({int(size) for size in (spec or '').split(',') if size.strip()})
+    if any(size < 1 for size in sizes):
+        raise ValueError(f'批大小必须为正整数: {spec}')
+    return sizes or [1]
+
+
+class WarmupState:
+    """
+    启动预热进度，预热结束后服务才报告就绪
+    require_all为True时有模型预热失败的worker始终不就绪，负载均衡器不会把流量发给无法服务的worker
+    """
+    def __init__(self, keys, batch_sizes, require_all=True):
+        self.keys = list(keys)
+        self.batch_sizes = list(batch_sizes)
+        self.require_all = require_all
+        self.done = []
+        self.errors = {}
+        self.started = None
+        self.finished = None
+        self._complete = threading.Event()
+        if not self.keys:
+            self._complete.set()
+
+    @property
+    def ready(self):
+        return self._complete.is_set() and not (self.require_all and self.errors)
+
+    def start(self):
+        self.started = time.time()
+
+    def record(self, key, error=None):
+        if error is None:
+            self.done.append(key)
+        else:
+            self.errors[key] = str(error)
+
+    def finish(self):
+        self.finished = time.time()
+        self._complete.set()
+
+    def wait(self, timeout=None):
+        """等待预热结束，返回是否已结束"""
+        return self._complete.wait(timeout)
+
+    def status(self):
+        """:return: (to_dict(), 状态码)，未就绪时状态码为503"""
+        return self.to_dict(), 200 if self.ready else 503
+
+    def to_dict(self):
+        return {
+            'ready': self.ready,
+            'models': len(self.keys),
+            'warmed': ['/'.join(map(str, key)) for key in self.done],
+            'errors': {'/'.join(map(str, key)): error for key, error in self.errors.items()},
+            'batch_sizes': self.batch_sizes,
+            'seconds': round((self.finished or time.time()) - self.started, 3) if self.started else None
+        }
@@ -0,0 +1,102 @@
+# model_service/serving/window_store.py
+import threading
+
+import numpy as np
+
+
+class StationWindow:
+    """单个监测站最近观测值的环形缓冲区，预先分配float32数组"""
+    def __init__(self, capacity, n_features, step=np.timedelta64(1, 'h')):
+        self.capacity = capacity
+        self.n_features = n_features
+        self.step = step  # 相邻两行观测的时间间隔
+        self.buffer = np.zeros((capacity, n_features), dtype=np.float32)
+        self.head = 0  # 下一次写入的位置
+        self.count = 0  # 累计写入的行数
+        self.last_timestamp = None
+        self.lock = threading.Lock()
+
+    @property
+    def available(self):
+        return min(self.count, self.capacity)
+
+    def append(self, rows, last_timestamp=None):
+        """
+        追加新的观测行
+        :param rows: 形状为(n, features)的数组
+        :param last_timestamp: 最后一行的观测时间，为空时按追加的行数和时间间隔顺延
+        """
+        n = rows.shape[0]
+        with self.lock:
+            if n >= self.capacity:
+                self.buffer[:] = rows[-self.capacity:]
+                self.head = 0
+            else:
+                first = min(n, self.capacity - self.head)
+                self.buffer[self.head:self.head + first] = rows[:first]
+                self.buffer[:n - first] = rows[first:]
+                self.head = (self.head + n) % self.capacity
+            self.count += n
+            if last_timestamp is not None:
+                self.last_timestamp = last_timestamp
+            elif self.last_timestamp is not None:
+                self.last_timestamp = self.last_timestamp + n * self.step
+
+    def latest(self, n):
+        """
+        按时间顺序返回最近n行的副本
+        :return: 形状为(n, features)的float32数组
+        """
+        with self.lock:
+            if n > self.available:
+                raise ValueError(f"监测站数据不足，需要至少{n}个时间步，当前只有{self.available}个")
+            start = (self.head - n) % self.capacity
+            if start + n <= self.capacity:
+                return self.buffer[start:start + n].copy()
+            return np.concatenate((self.buffer[start:], self.buffer[:self.head]))
+
+
+class StationWindowStore:
+    """按监测站保存最近观测值，预测时直接从缓冲区读取输入窗口"""
+    def __init__(self, capacity=1024, max_stations=1024, step=np.timedelta64(1, 'h')):
+        self.capacity = capacity
+        self.max_stations = max_stations
+        self.step = step
+        self._stations = {}
+        self._lock = threading.Lock()
+
+    def append(self, station_id, rows, last_timestamp=None):
+        """
+        :param station_id: 监测站标识
+        :param rows: 形状为(n, features)的数组
+        :return: StationWindow
+        """
+        rows = np.asarray(rows, dtype=np.float32)
+        if rows.ndim != 2 or rows.shape[0] == 0:
+            raise ValueError(f"观测数据应为非空二维数组，实际形状为{rows.shape}")
+        with self._lock:
+            window = self._stations.get(station_id)
+            if window is None:
+                if len(self._stations) >= self.max_stations:
+                    raise ValueError(f"监测站数量已达上限{self.max_stations}")
+                window = self._stations[station_id] = StationWindow(self.capacity, rows.shape[1], self.step)
+        if rows.shape[1] != window.n_features:
+            raise ValueError(f"监测站{station_id}的特征数为{window.n_features}，但提供了{rows.shape[1]}个")
+        window.append(rows, last_timestamp)
+        return window
+
+    def get(self, station_id):
+        with self._lock:
+            window = self._stations.get(station_id)
+        if window is None:
+            raise KeyError(station_id)
+        return window
+
+    def stats(self):
+        with self._lock:
+            stations = dict(self._stations)
+        return {
+            'stations': len(stations),
+            'capacity': self.capacity,
+            'bytes': sum(w.buffer.nbytes for w in stations.values())
+        }
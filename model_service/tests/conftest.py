@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 与app.py相同：serving包位于model_service目录，模型代码位于r-informer目录
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.append(os.path.join(ROOT, 'r-informer'))
@@ -0,0 +1,28 @@
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+from models.model import Informer
+from serving.backends import TensorOutput, check_parity, export_torchscript, load_torchscript
+
+
+def tiny_informer(output_attention=False, attn='prob'):
+    args = SimpleNamespace(enc_in=5, dec_in=5, c_out=1, seq_len=24, label_len=12, pred_len=6,
+                           output_attention=output_attention)
+    torch.manual_seed(0)
+    model = Informer(args.enc_in, args.dec_in, args.c_out, args.seq_len, args.label_len, args.pred_len,
+                     factor=3, d_model=16, n_heads=2, e_layers=2, d_layers=1, d_ff=32, attn=attn, embed='fixed',
+                     output_attention=output_attention, device=torch.device('cpu')).eval()
+    return model, args
+
+
+@pytest.mark.parametrize('output_attention', [False, True])
+def test_torchscript_trace_matches_eager(tmp_path, output_attention):
+    model, args = tiny_informer(output_attention)
+    path = str(tmp_path / 'checkpoint.torchscript.pt')
+    errors = export_torchscript(model, args, path)
+    assert max(errors.values()) <= 1e-4
+    loaded = load_torchscript(path)
+    reference = TensorOutput(model) if output_attention else model
+    assert max(check_parity(reference, loaded, args, batch_sizes=(1, 3), seed=1).values()) <= 1e-4
@@ -0,0 +1,34 @@
+import threading
+
+import pytest
+
+from serving.batching import BatchScheduler
+
+
+def test_concurrent_requests_are_merged_per_key():
+    batches = []
+    release = threading.Event()
+
+    def run_batch(context, items):
+        release.wait(5)
+        batches.append((context, list(items)))
+        return [context * item for item in items]
+    scheduler = BatchScheduler(run_batch, window_ms=50, max_batch_size=4)
+    futures = [scheduler.submit('a', 10, i) for i in range(6)] + [scheduler.submit('b', 100, 1)]
+    release.set()
+    assert [f.result(5) for f in futures] == [0, 10, 20, 30, 40, 50, 100]
+    assert all(len(items) <= 4 for _, items in batches)
+    assert sorted(len(items) for context, items in batches if context == 10) == [2, 4]
+    stats = scheduler.stats()
+    assert stats['requests'] == 7
+    assert sum(size * count for size, count in stats['batch_sizes'].items()) == 7
+
+
+def test_batch_failure_fails_every_request():
+    def run_batch(context, items):
+        raise RuntimeError('forward failed')
+    scheduler = BatchScheduler(run_batch, window_ms=20, max_batch_size=8)
+    futures = [scheduler.submit('a', None, i) for i in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(5)
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from serving.calendar import CalendarEncoder
+
+
+def reference(start, length, freq):
+    """与utils.timefeatures.time_features(timeenc=0)相同的[month, day, weekday, hour(, minute)]列"""
+    dates = pd.date_range(start, periods=length, freq='15min' if freq == 't' else '1h')
+    columns = [dates.month, dates.day, dates.weekday, dates.hour]
+    if freq == 't':
+        columns.append(dates.minute // 15)
+    return np.stack(columns, axis=1).astype(np.float32)
+
+
+@pytest.mark.parametrize('freq', ['h', 't'])
+@pytest.mark.parametrize('start', ['2024-02-28 20:00', '2023-12-31 23:00', '2020-10-25 01:45', '2099-06-30 12:00'])
+def test_marks_match_time_features(freq, start):
+    encoder = CalendarEncoder(freq)
+    np.testing.assert_array_equal(encoder.marks([np.datetime64(start)], 200)[0], reference(start, 200, freq))
+
+
+def test_window_marks_align_with_end_time():
+    encoder = CalendarEncoder('h')
+    enc, dec = encoder.window_marks(['2024-05-01T08:00', '2024-12-31T23:00'], 96, 48, 24)
+    assert enc.shape == (2, 96, 4)
+    assert dec.shape == (2, 72, 4)
+    np.testing.assert_array_equal(enc[1], reference('2024-12-28 00:00', 96, 'h'))
+    np.testing.assert_array_equal(dec[1], reference('2024-12-30 00:00', 72, 'h'))
+
+
+def test_out_of_range_and_unsupported_freq():
+    with pytest.raises(ValueError):
+        CalendarEncoder('h', start='2000-01-01', end='2000-01-02').marks(['2000-01-01T20:00'], 10)
+    with pytest.raises(ValueError):
+        CalendarEncoder('d')
@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+from serving.horizon import HorizonRouter
+
+DATA = 'QianTangRiver2020-2024WorkedFull'
+
+
+def test_routes_to_shortest_covering_model():
+    router = HorizonRouter.from_spec(json.dumps([
+        {'data_name': DATA, 'pred_len': 168},
+        {'data_name': DATA, 'pred_len': 48, 'horizons': [1, 48]},
+        {'data_name': DATA, 'pred_len': 24, 'weights': 'student', 'horizons': [12, 24]}
+    ]))
+    assert router.route(DATA, 6, 'w') == (DATA, 48, 'w')
+    assert router.route(DATA, 100, 'w') == (DATA, 168, 'w')
+    assert router.route(DATA, 12, 'student') == (DATA, 24, 'student')
+    assert router.route(DATA, 6, 'student') == (DATA, 48, 'student')
+    # 没有覆盖的路由时原样返回
+    assert router.route(DATA, 336, 'w') == (DATA, 336, 'w')
+    assert router.route('ETTh1', 6, 'w') == ('ETTh1', 6, 'w')
+
+
+def test_spec_from_file_and_empty_spec(tmp_path):
+    path = tmp_path / 'routes.json'
+    path.write_text(json.dumps([{'data_name': DATA, 'pred_len': 72}]), encoding='utf-8')
+    router = HorizonRouter.from_spec(str(path))
+    assert router.table() == [{'data_name': DATA, 'pred_len': 72, 'weights': None, 'horizons': [1, 72]}]
+    assert HorizonRouter.from_spec('').route(DATA, 6, 'w') == (DATA, 6, 'w')
+
+
+def test_horizons_outside_model_length_rejected():
+    with pytest.raises(ValueError):
+        HorizonRouter.from_spec(json.dumps([{'data_name': DATA, 'pred_len': 24, 'horizons': [1, 48]}]))
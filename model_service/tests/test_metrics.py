@@ -0,0 +1,55 @@
+import pytest
+
+from serving.metrics import MetricsRegistry
+
+
+def render_lines(registry):
+    text = registry.render()
+    assert text.endswith('\n')
+    return text.splitlines()
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram('request_seconds', '请求耗时', ('endpoint',), buckets=(0.5, 0.1, 1.0))
+    for value in (0.05, 0.1, 0.3, 0.7, 2.0):
+        latency.observe(value, '/predict')
+    assert render_lines(registry) == [
+        '# HELP request_seconds 请求耗时',
+        '# TYPE request_seconds histogram',
+        'request_seconds_bucket{endpoint="/predict",le="0.1"} 2',
+        'request_seconds_bucket{endpoint="/predict",le="0.5"} 3',
+        'request_seconds_bucket{endpoint="/predict",le="1.0"} 4',
+        'request_seconds_bucket{endpoint="/predict",le="+Inf"} 5',
+        'request_seconds_sum{endpoint="/predict"} 3.15',
+        'request_seconds_count{endpoint="/predict"} 5'
+    ]
+
+
+def test_counter_gauge_and_label_escaping():
+    registry = MetricsRegistry()
+    predictions = registry.counter('predictions_total', '预测数', ('weights', 'source'))
+    in_flight = registry.gauge('in_flight', '进行中的请求')
+    predictions.inc('a"b\\c\nd', 'model')
+    predictions.inc('w', 'model', amount=3)
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+    assert render_lines(registry) == [
+        '# HELP predictions_total 预测数',
+        '# TYPE predictions_total counter',
+        'predictions_total{weights="a\\"b\\\\c\\nd",source="model"} 1',
+        'predictions_total{weights="w",source="model"} 3',
+        '# HELP in_flight 进行中的请求',
+        '# TYPE in_flight gauge',
+        'in_flight 1'
+    ]
+
+
+def test_collectors_run_on_render_and_labels_checked():
+    registry = MetricsRegistry()
+    rss = registry.gauge('rss_bytes', '常驻内存')
+    registry.add_collector(lambda: rss.set(1024))
+    assert 'rss_bytes 1024' in render_lines(registry)
+    with pytest.raises(ValueError):
+        rss.set(1, 'unexpected')
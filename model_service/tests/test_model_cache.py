@@ -0,0 +1,62 @@
+import threading
+import time
+
+from serving.model_cache import ModelCache
+
+
+class Entry:
+    def __init__(self, name, nbytes):
+        self.name = name
+        self.nbytes = nbytes
+
+
+def test_lru_eviction_by_bytes():
+    cache = ModelCache(max_bytes=250)
+    removed = []
+    cache.add_listener(removed.extend)
+    for name in 'abc':
+        cache.get(name, lambda name=name: Entry(name, 100))
+    assert cache.keys() == ['b', 'c']
+    assert [e.name for e in removed] == ['a']
+    cache.get('b', lambda: Entry('b', 100))
+    cache.get('d', lambda: Entry('d', 100))
+    assert cache.keys() == ['b', 'd']
+    assert cache.stats()['evictions'] == 2
+    assert cache.stats()['bytes'] == 200
+
+
+def test_max_entries_and_oversized_entry_kept():
+    cache = ModelCache(max_bytes=10, max_entries=2)
+    cache.get('a', lambda: Entry('a', 100))
+    assert cache.keys() == ['a']
+    cache.get('b', lambda: Entry('b', 1))
+    assert cache.keys() == ['b']
+
+
+def test_concurrent_misses_load_once():
+    cache = ModelCache(max_bytes=1000)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        time.sleep(0.1)
+        return Entry('a', 1)
+    threads = [threading.Thread(target=cache.get, args=('a', loader)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(loads) == 1
+    assert cache.stats()['misses'] == 1
+    assert cache.stats()['hits'] == 7
+
+
+def test_invalidate_notifies_listeners():
+    cache = ModelCache(max_bytes=1000)
+    removed = []
+    cache.add_listener(removed.extend)
+    cache.get('a', lambda: Entry('a', 10))
+    cache.get('b', lambda: Entry('b', 10))
+    assert cache.invalidate(lambda key, entry: key == 'a') == 1
+    assert [e.name for e in removed] == ['a']
+    assert cache.stats()['bytes'] == 10
@@ -0,0 +1,103 @@
+import io
+
+import numpy as np
+import pytest
+
+from serving.payload import (NPY_CONTENT_TYPE, RAW_CONTENT_TYPE, SHAPE_HEADER, PayloadError, binary_params,
+                             decode_binary, decode_npy, decode_raw, parse_json, parse_pred_len, parse_timestamp)
+
+
+class FakeRequest:
+    def __init__(self, body=b'', mimetype=RAW_CONTENT_TYPE, headers=None, args=None, json=None):
+        self.body = body
+        self.json = json
+        self.mimetype = mimetype
+        self.headers = headers or {}
+        self.args = args or {}
+
+    def get_data(self, cache=True):
+        return self.body
+
+    def get_json(self, silent=False):
+        return self.json
+
+
+def npy_bytes(array):
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('array', [
+    np.arange(12, dtype=np.float32).reshape(4, 3),
+    np.arange(12, dtype=np.float64).reshape(3, 4),
+    np.asfortranarray(np.arange(6, dtype=np.float32).reshape(2, 3)),
+    np.float32(1.5)
+])
+def test_decode_npy_roundtrip(array):
+    np.testing.assert_array_equal(decode_npy(npy_bytes(array)), array)
+
+
+def test_decode_raw_is_zero_copy():
+    array = np.arange(10, dtype='<f4').reshape(5, 2)
+    body = array.tobytes()
+    decoded = decode_binary(FakeRequest(body, headers={SHAPE_HEADER: '5,2'}))
+    np.testing.assert_array_equal(decoded, array)
+    assert not decoded.flags.owndata
+
+
+@pytest.mark.parametrize('body, shape', [(b'\0' * 12, '2,2'), (b'\0' * 16, '2,x'), (b'\0' * 16, None)])
+def test_decode_raw_errors(body, shape):
+    with pytest.raises(PayloadError):
+        decode_raw(body, shape)
+
+
+@pytest.mark.parametrize('body', [b'not npy', npy_bytes(np.arange(4, dtype=np.float32))[:-4],
+                                  npy_bytes(np.array(['a', 'b']))])
+def test_invalid_npy_raises_payload_error(body):
+    with pytest.raises(PayloadError):
+        decode_binary(FakeRequest(body, mimetype=NPY_CONTENT_TYPE))
+
+
+def test_binary_params():
+    params = binary_params(FakeRequest(args={'prediction_hours': '6,12', 'weights': 'w', 'other': 'x'}))
+    assert params == {'prediction_hours': [6, 12], 'weights': 'w'}
+    assert binary_params(FakeRequest(args={'prediction_hours': '24'}))['prediction_hours'] == 24
+    with pytest.raises(PayloadError):
+        binary_params(FakeRequest(args={'prediction_hours': '6,abc'}))
+
+
+def test_parse_timestamp():
+    assert parse_timestamp(None) is None
+    assert parse_timestamp('2024-05-01 08:30:15') == np.datetime64('2024-05-01T08:30')
+    with pytest.raises(PayloadError):
+        parse_timestamp('not a time')
+
+
+@pytest.mark.parametrize('value, expected', [(24, 24), ('24', 24), (' 6 ', 6), (np.int64(12), 12)])
+def test_parse_pred_len(value, expected):
+    pred_len = parse_pred_len(value)
+    assert pred_len == expected and type(pred_len) is int
+
+
+@pytest.mark.parametrize('value', [0, -3, '0', 'abc', '', 24.0, 1.5, True, None, [24]])
+def test_invalid_pred_len(value):
+    with pytest.raises(PayloadError):
+        parse_pred_len(value)
+
+
+def test_parse_json():
+    assert parse_json(FakeRequest(json={'input_data': []})) == {'input_data': []}
+    for body in (None, [1, 2], 'text'):
+        with pytest.raises(PayloadError):
+            parse_json(FakeRequest(json=body))
+
+
+def test_parse_json_malformed_flask_request():
+    from flask import Flask
+
+    app = Flask(__name__)
+    with app.test_request_context(data='{"input_data": [', content_type='application/json'):
+        from flask import request
+        with pytest.raises(PayloadError):
+            parse_json(request)
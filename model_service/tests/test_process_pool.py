@@ -0,0 +1,108 @@
+import os
+import signal
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+from serving.backends import TensorOutput
+from serving.model_cache import LoadedModel
+from serving.process_pool import ProcessInferencePool
+
+
+class Scale(torch.nn.Module):
+    def __init__(self, factor, delay=0.0):
+        super(Scale, self).__init__()
+        self.factor = torch.nn.Parameter(torch.tensor(float(factor)))
+        self.delay = delay
+
+    def forward(self, x):
+        if self.delay:
+            time.sleep(self.delay)
+        return x * self.factor
+
+
+class WithAttention(torch.nn.Module):
+    """与output_attention为True的Informer相同，返回(预测, 注意力)"""
+    def __init__(self, factor):
+        super(WithAttention, self).__init__()
+        self.scale = Scale(factor)
+
+    def forward(self, x_enc, x_mark_enc, x_dec, x_mark_dec):
+        return self.scale(x_enc), [None]
+
+
+def entry(module, output_attention=False, backend='eager'):
+    return LoadedModel(module.eval(), SimpleNamespace(output_attention=output_attention), 'setting', 'weights.pth',
+                       backend)
+
+
+@pytest.fixture
+def pool():
+    pools = []
+
+    def build(**kwargs):
+        pools.append(ProcessInferencePool(1, torch_threads=1, check_interval=0.2, **kwargs))
+        return pools[-1]
+    yield build
+    for p in pools:
+        p.close()
+
+
+def test_run_matches_local_forward(pool):
+    p = pool()
+    model = entry(Scale(3))
+    x = torch.randn(2, 4)
+    assert torch.allclose(p.run(model, x), x * 3)
+    assert p.stats()['completed'] == 1
+
+
+def test_dead_worker_fails_pending_requests_and_restarts(pool):
+    p = pool(timeout=60)
+    model = entry(Scale(2, delay=30))
+    errors = []
+
+    def call():
+        try:
+            p.run(model, torch.ones(1))
+        except Exception as e:
+            errors.append(e)
+    thread = threading.Thread(target=call)
+    thread.start()
+    time.sleep(2)
+    os.kill(p._workers[0].process.pid, signal.SIGKILL)
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert isinstance(errors[0], RuntimeError)
+    assert p.stats()['restarts'] == 1
+    assert torch.allclose(p.run(entry(Scale(2)), torch.ones(1)), torch.full((1,), 2.0))
+
+
+def test_result_timeout(pool):
+    p = pool(timeout=0.5)
+    with pytest.raises(TimeoutError):
+        p.run(entry(Scale(1, delay=5)), torch.ones(1))
+    assert p.stats()['workers'][0]['pending'] == 0
+    assert p.stats()['timeouts'] == 1
+
+
+def test_release_drops_model_from_workers(pool):
+    p = pool()
+    model = entry(Scale(1))
+    p.run(model, torch.ones(1))
+    assert p.stats()['workers'][0]['models'] == 1
+    p.release(model)
+    assert p.stats()['workers'][0]['models'] == 0
+
+
+def test_attention_outputs_unwrapped_once(pool):
+    p = pool()
+    x = torch.randn(3, 4)
+    inputs = (x, torch.zeros(3, 4), torch.zeros(3, 4), torch.zeros(3, 4))
+    eager = entry(WithAttention(2), output_attention=True)
+    wrapped = entry(TensorOutput(WithAttention(2)), output_attention=True, backend='int8')
+    assert eager.returns_attention and not wrapped.returns_attention
+    assert torch.allclose(p.run(eager, *inputs), x * 2)
+    assert torch.allclose(p.run(wrapped, *inputs), x * 2)
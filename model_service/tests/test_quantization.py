@@ -0,0 +1,49 @@
+import json
+import os
+import time
+
+import torch
+
+from serving.backends import example_inputs
+from serving.quantization import check_report, quantize_model, report_path
+from test_backends import tiny_informer
+
+
+def test_quantized_model_close_to_float():
+    # ProbAttention选出的top-u个query会随量化误差变化，输出出现跳变，这里用full注意力只比较量化误差；
+    # 实际模型的精度由check_report在测试集指标上把关
+    model, args = tiny_informer(output_attention=True, attn='full')
+    quantized = quantize_model(model, args)
+    assert quantized.nbytes > 0
+    inputs = example_inputs(args, 2)
+    with torch.no_grad():
+        expected = model(*inputs)[0]
+        actual = quantized(*inputs)
+    assert actual.shape == expected.shape
+    assert float((actual - expected).abs().max()) < 0.05 * float(expected.abs().max())
+
+
+def write_report(weights_path, mae_change, rmse_change):
+    with open(report_path(weights_path), 'w', encoding='utf-8') as f:
+        json.dump({'degradation': {'mae': mae_change, 'rmse': rmse_change}}, f)
+
+
+def test_check_report_gate(tmp_path):
+    weights = str(tmp_path / 'checkpoint.pth')
+    open(weights, 'wb').close()
+    allowed, reason = check_report(weights, 0.02)
+    assert not allowed and '没有量化验证报告' in reason
+
+    write_report(weights, 0.01, 0.015)
+    assert check_report(weights, 0.02) == (True, None)
+
+    write_report(weights, 0.01, 0.05)
+    allowed, reason = check_report(weights, 0.02)
+    assert not allowed and 'rmse' in reason
+
+    # 权重文件更新后需要重新验证
+    write_report(weights, 0.0, 0.0)
+    later = time.time() + 10
+    os.utime(weights, (later, later))
+    allowed, reason = check_report(weights, 0.02)
+    assert not allowed and '早于权重文件' in reason
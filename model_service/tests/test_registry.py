@@ -0,0 +1,78 @@
+import os
+import time
+
+import pytest
+
+from serving.registry import CheckpointRegistry, _pick_default, parse_setting
+
+SETTING = ('informer_QianTangRiver2020-2024WorkedFull_ftMS_sl96_ll48_pl24_dm128_nh8_el2_dl1_df2048'
+           '_atprob_fc5_ebtimeF_dtTrue_mxTrue_test_0')
+
+
+def touch(path, content=b'weights'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def test_parse_setting():
+    params = parse_setting(SETTING)
+    assert params['data'] == 'QianTangRiver2020-2024WorkedFull'
+    assert params['pred_len'] == 24 and params['d_ff'] == 2048 and params['ii'] == 0
+    assert params['distil'] is True and params['attn'] == 'prob' and params['des'] == 'test'
+    student = parse_setting(SETTING.replace('dm128', 'dm32').replace('atprob', 'atfull_fused').replace('mxTrue', 'mxFalse'))
+    assert student['d_model'] == 32 and student['attn'] == 'full_fused' and student['mix'] is False
+    assert parse_setting('informer_mtest_0') is None
+
+
+def test_pick_default_prefers_checkpoint():
+    assert _pick_default(['b.pth', 'checkpoint.pth', 'a.pth']) == 'checkpoint.pth'
+    assert _pick_default(['b.pth', 'a.pth']) == 'a.pth'
+
+
+def test_resolve_layouts(tmp_path):
+    root = str(tmp_path)
+    touch(os.path.join(root, 'informer_mtest_0', 'checkpoint.pth'))
+    touch(os.path.join(root, 'informer_mtest_0', 'epoch1.pth'))
+    touch(os.path.join(root, SETTING, 'student.pth'))
+    touch(os.path.join(root, 'loose.pth'))
+    registry = CheckpointRegistry(root, refresh_seconds=0)
+    assert registry.resolve('informer_mtest_0').path.endswith(os.path.join('informer_mtest_0', 'checkpoint.pth'))
+    student = registry.resolve('student', SETTING)
+    assert student.dataset == 'QianTangRiver2020-2024WorkedFull' and student.architecture['d_model'] == 128
+    assert registry.resolve('loose').architecture == {}
+    with pytest.raises(Exception):
+        registry.resolve('student')
+    assert [e.name for e in registry.entries()] == [SETTING, 'informer_mtest_0', 'loose']
+    assert registry.datasets() == ['QianTangRiver2020-2024WorkedFull']
+
+
+def test_refresh_notifies_changed_paths(tmp_path):
+    root = str(tmp_path)
+    first = os.path.join(root, 'w', 'a.pth')
+    touch(first)
+    registry = CheckpointRegistry(root, refresh_seconds=0)
+    changed = []
+    registry.add_listener(changed.append)
+    assert registry.refresh() is False
+    # 新增的checkpoint.pth成为默认权重，原默认文件对应的模型需要失效
+    touch(os.path.join(root, 'w', 'checkpoint.pth'))
+    assert registry.refresh() is True
+    assert changed == [{first}]
+    assert registry.resolve('w').path.endswith('checkpoint.pth')
+    os.remove(first)
+    registry.refresh()
+    assert changed[-1] == {first}
+
+
+def test_watcher_picks_up_new_weights(tmp_path):
+    root = str(tmp_path)
+    registry = CheckpointRegistry(root, refresh_seconds=0.05)
+    try:
+        touch(os.path.join(root, 'new.pth'))
+        deadline = time.time() + 5
+        while time.time() < deadline and not registry.entries():
+            time.sleep(0.05)
+        assert registry.resolve('new').path == os.path.join(root, 'new.pth')
+    finally:
+        registry.close()
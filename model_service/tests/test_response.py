@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from serving.response import format_predictions
+
+
+def baseline(predictions, pred_len, start_time):
+    """原先逐小时循环生成预测结果的实现"""
+    result = []
+    for i in range(pred_len):
+        o2_value = float(predictions[i][0])
+        result.append({
+            'date': (start_time + timedelta(hours=i)).isoformat(),
+            'temperature': round(max(0, min(35, 20 + (o2_value - 8) * 0.5)), 2),
+            'pH': round(max(6, min(9, 7.5 + (o2_value - 8) * 0.1)), 2),
+            'O2': round(o2_value, 2),
+            'NTU': round(max(0, 10 - (o2_value - 8) * 0.5), 2),
+            'uS': round(max(50, min(1500, 500 + (o2_value - 8) * 20)), 2)
+        })
+    return result
+
+
+@pytest.mark.parametrize('start_time', [datetime(2024, 5, 1, 8), datetime(2024, 5, 1, 8, 30, 15),
+                                        datetime(2024, 12, 31, 23, 30, 15, 123456)])
+def test_dates_match_isoformat(start_time):
+    predictions = np.zeros((30, 1))
+    rows = format_predictions(predictions, 30, start_time=start_time)
+    assert [row['date'] for row in rows] == [row['date'] for row in baseline(predictions, 30, start_time)]
+
+
+def test_values_match_round_except_at_midpoints():
+    predictions = np.random.RandomState(0).uniform(-20, 40, (2000, 1)).astype(np.float32)
+    start_time = datetime(2024, 5, 1, 8)
+    actual = format_predictions(predictions, len(predictions), start_time=start_time)
+    expected = baseline(predictions, len(predictions), start_time)
+    for row, reference in zip(actual, expected):
+        for field in ('temperature', 'pH', 'O2', 'NTU', 'uS'):
+            if row[field] != reference[field]:
+                # 只有乘以100后距离x.5不到浮点误差的值才会不同，且只差一个最小单位
+                assert abs(abs(row[field] - reference[field]) - 0.01) < 1e-9
+
+
+def test_np_round_differs_from_round_at_midpoint():
+    # 6.255的二进制值略小于6.255，内置round得到6.25；np.round先乘以100得到625.5，向偶数舍入为6.26
+    row = format_predictions(np.array([[6.255]]), 1, start_time=datetime(2024, 5, 1, 8))[0]
+    assert row['O2'] == 6.26
+    assert round(6.255, 2) == 6.25
+
+
+def test_numpy_start_time_and_columnar_layout():
+    predictions = np.full((6, 1), 8.0, dtype=np.float32)
+    columns = format_predictions(predictions, 3, 'columnar', np.datetime64('2024-05-01T09:00'))
+    assert columns['date'] == ['2024-05-01T09:00:00', '2024-05-01T10:00:00', '2024-05-01T11:00:00']
+    assert columns['O2'] == [8.0, 8.0, 8.0]
+
+
+def test_unknown_layout():
+    with pytest.raises(ValueError):
+        format_predictions(np.zeros((1, 1)), 1, 'table')
@@ -0,0 +1,44 @@
+import time
+
+import numpy as np
+import pytest
+
+from serving.result_cache import ResultCache
+
+KEY = ('QianTangRiver2020-2024WorkedFull', 24, 'informer_mtest_0')
+
+
+def test_fingerprint_depends_on_model_key_and_window():
+    window = np.arange(20, dtype=np.float32).reshape(4, 5)
+    assert ResultCache.fingerprint(KEY, window) == ResultCache.fingerprint(KEY, window.copy())
+    assert ResultCache.fingerprint(KEY, window) != ResultCache.fingerprint(KEY[:2] + ('other',), window)
+    changed = window.copy()
+    changed[-1, -1] += 1
+    assert ResultCache.fingerprint(KEY, window) != ResultCache.fingerprint(KEY, changed)
+    assert ResultCache.fingerprint(KEY, window) != ResultCache.fingerprint(KEY, window.reshape(5, 4))
+
+
+def test_lru_eviction_and_read_only_values():
+    cache = ResultCache(ttl_seconds=60, max_entries=2)
+    for key in 'abc':
+        cache.put(key, np.zeros(3))
+    assert cache.get('a') is None
+    value = cache.get('c')
+    with pytest.raises(ValueError):
+        value[0] = 1
+    cache.get('b')
+    cache.put('d', np.zeros(3))
+    assert cache.get('c') is None
+    assert cache.get('b') is not None
+    assert cache.stats()['evictions'] == 2
+
+
+def test_expired_entries_are_dropped():
+    cache = ResultCache(ttl_seconds=0.05, max_entries=8)
+    cache.put('a', np.ones(2))
+    assert cache.get('a') is not None
+    time.sleep(0.1)
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert stats['expirations'] == 1
+    assert stats['entries'] == 0
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+from serve import with_fast_routes
+
+
+def call(app, path, method='GET'):
+    """执行一次ASGI请求，返回(状态码, 响应体)"""
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path}
+    asyncio.run(app(scope, receive, send))
+    return messages[0]['status'], b''.join(m.get('body', b'') for m in messages[1:])
+
+
+def build():
+    forwarded = []
+
+    async def wsgi_app(scope, receive, send):
+        forwarded.append(scope['path'])
+        await send({'type': 'http.response.start', 'status': 204, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+    app = with_fast_routes(wsgi_app, {
+        '/health': lambda: ({'status': 'OK'}, 200),
+        '/ready': lambda: ({'ready': False}, 503)
+    })
+    return app, forwarded
+
+
+def test_fast_routes_answer_in_event_loop():
+    app, forwarded = build()
+    assert call(app, '/health') == (200, json.dumps({'status': 'OK'}).encode('utf-8'))
+    status, body = call(app, '/ready')
+    assert status == 503
+    assert json.loads(body) == {'ready': False}
+    assert forwarded == []
+
+
+def test_other_requests_go_to_wsgi_app():
+    app, forwarded = build()
+    assert call(app, '/api/water-quality/predict', 'POST')[0] == 204
+    assert call(app, '/ready', 'POST')[0] == 204
+    assert forwarded == ['/api/water-quality/predict', '/ready']
+
+
+def test_lifespan():
+    app, _ = build()
+    sent = []
+    messages = iter([{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}])
+
+    async def receive():
+        return next(messages)
+
+    async def send(message):
+        sent.append(message['type'])
+
+    asyncio.run(app({'type': 'lifespan'}, receive, send))
+    assert sent == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
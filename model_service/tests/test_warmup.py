@@ -0,0 +1,53 @@
+import pytest
+
+from serving.warmup import WarmupState, parse_batch_sizes, parse_warmup_models
+
+KEY = ('QianTangRiver2020-2024WorkedFull', 24, 'informer_mtest_0')
+
+
+def test_parse_specs():
+    assert parse_warmup_models(' QianTangRiver2020-2024WorkedFull:24:informer_mtest_0; ETTh1:48:w ;') == \
+        [KEY, ('ETTh1', 48, 'w')]
+    assert parse_warmup_models('') == []
+    with pytest.raises(ValueError):
+        parse_warmup_models('ETTh1:48')
+    assert parse_batch_sizes('16, 1,8,1') == [1, 8, 16]
+    assert parse_batch_sizes('') == [1]
+    with pytest.raises(ValueError):
+        parse_batch_sizes('0,4')
+
+
+def test_ready_after_successful_warmup():
+    state = WarmupState([KEY], [1, 16])
+    state.start()
+    assert state.status()[1] == 503
+    assert not state.wait(0)
+    state.record(KEY)
+    state.finish()
+    payload, status = state.status()
+    assert status == 200
+    assert payload['ready'] and payload['warmed'] == ['QianTangRiver2020-2024WorkedFull/24/informer_mtest_0']
+
+
+def test_failed_warmup_keeps_worker_unready():
+    state = WarmupState([KEY, ('ETTh1', 48, 'w')], [1])
+    state.start()
+    state.record(KEY)
+    state.record(('ETTh1', 48, 'w'), Exception('模型文件不存在'))
+    state.finish()
+    assert state.wait(0)
+    payload, status = state.status()
+    assert status == 503
+    assert payload['errors'] == {'ETTh1/48/w': '模型文件不存在'}
+
+
+def test_failed_warmup_ready_when_not_required():
+    state = WarmupState([KEY], [1], require_all=False)
+    state.start()
+    state.record(KEY, Exception('模型文件不存在'))
+    state.finish()
+    assert state.status()[1] == 200
+
+
+def test_no_models_is_ready_immediately():
+    assert WarmupState([], [1]).status()[1] == 200
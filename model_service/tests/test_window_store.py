@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from serving.window_store import StationWindowStore
+
+
+def rows(start, n, features=2):
+    return np.arange(start, start + n, dtype=np.float32)[:, None].repeat(features, axis=1)
+
+
+def test_latest_across_wraparound():
+    store = StationWindowStore(capacity=5)
+    reference = []
+    for start, n in ((0, 3), (3, 4), (7, 1), (8, 9), (17, 2)):
+        window = store.append('s1', rows(start, n))
+        reference.extend(range(start, start + n))
+        for k in range(1, window.available + 1):
+            np.testing.assert_array_equal(window.latest(k)[:, 0], reference[-k:])
+    assert window.available == 5
+    with pytest.raises(ValueError):
+        window.latest(6)
+
+
+def test_timestamp_advances_without_explicit_value():
+    store = StationWindowStore(capacity=8)
+    window = store.append('s1', rows(0, 4), np.datetime64('2024-05-01T08:00'))
+    store.append('s1', rows(4, 3))
+    assert window.last_timestamp == np.datetime64('2024-05-01T11:00')
+    store.append('s1', rows(7, 1), np.datetime64('2024-05-02T00:00'))
+    assert window.last_timestamp == np.datetime64('2024-05-02T00:00')
+    assert store.append('s2', rows(0, 2)).last_timestamp is None
+
+
+def test_validation_errors():
+    store = StationWindowStore(capacity=4, max_stations=1)
+    store.append('s1', rows(0, 2))
+    with pytest.raises(ValueError):
+        store.append('s1', rows(0, 2, features=3))
+    with pytest.raises(ValueError):
+        store.append('s2', rows(0, 2))
+    with pytest.raises(ValueError):
+        store.append('s1', np.zeros((0, 2)))
+    with pytest.raises(KeyError):
+        store.get('missing')